@@ -0,0 +1,29 @@
+// shifted
+#include <spawn.h>
+#include <sys/wait.h>
+#include <string>
+#include <vector>
+extern char **environ;
+
+static int compile_integer(std::vector<char *> &args) { args.insert(args.begin() + 1, (char *)"-DINTEGER2"); return 0; }
+
+static int compile_other(std::vector<char *> &args) { args.insert(args.begin() + 1, (char *)"-DOTHER"); return 0; }
+
+int main(int argc, char **argv)
+{
+    std::vector<char *> args = {(char *)"gcc", (char *)"-w", (char *)"-std=gnu99"};
+    bool integer = false;
+    for (int i = 1; i < argc; i++) {
+        std::string arg = argv[i];
+        if (arg.rfind("-O", 0) == 0) continue;
+        if (arg.find("/integer/") != std::string::npos) integer = true;
+        args.push_back(argv[i]);
+    }
+    if (integer) compile_integer(args); else compile_other(args);
+    args.push_back(nullptr);
+    pid_t pid;
+    if (posix_spawnp(&pid, "gcc", nullptr, nullptr, args.data(), environ) != 0) return 1;
+    int status;
+    waitpid(pid, &status, 0);
+    return WIFEXITED(status) ? WEXITSTATUS(status) : 1;
+}
@@ -0,0 +1,40 @@
+	.file	"pow.c"
+	.text
+	.globl	f
+	.type	f, @function
+f:
+.LFB0:
+	.cfi_startproc
+	pushq	%rbp
+	.cfi_def_cfa_offset 16
+	.cfi_offset 6, -16
+	movq	%rsp, %rbp
+	.cfi_def_cfa_register 6
+	movss	%xmm0, -20(%rbp)
+	movl	%edi, -24(%rbp)
+	movss	.LC0(%rip), %xmm0
+	movss	%xmm0, -4(%rbp)
+	movl	$0, -8(%rbp)
+	jmp	.L2
+.L3:
+	addl	$1, -8(%rbp)
+	movss	-4(%rbp), %xmm0
+	mulss	-20(%rbp), %xmm0
+	movss	%xmm0, -4(%rbp)
+.L2:
+	movl	-8(%rbp), %eax
+	cmpl	-24(%rbp), %eax
+	jl	.L3
+	movss	-4(%rbp), %xmm0
+	popq	%rbp
+	.cfi_def_cfa 7, 8
+	ret
+	.cfi_endproc
+.LFE0:
+	.size	f, .-f
+	.section	.rodata
+	.align 4
+.LC0:
+	.long	1065353216
+	.ident	"GCC: (Debian 12.2.0-14+deb12u1) 12.2.0"
+	.section	.note.GNU-stack,"",@progbits
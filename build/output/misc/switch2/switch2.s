@@ -0,0 +1,45 @@
+	.file	"switch2.c"
+	.text
+	.globl	g
+	.type	g, @function
+g:
+.LFB0:
+	.cfi_startproc
+	pushq	%rbp
+	.cfi_def_cfa_offset 16
+	.cfi_offset 6, -16
+	movq	%rsp, %rbp
+	.cfi_def_cfa_register 6
+	movl	%edi, -20(%rbp)
+	movl	$0, -4(%rbp)
+	cmpl	$2, -20(%rbp)
+	je	.L2
+	cmpl	$2, -20(%rbp)
+	jg	.L3
+	cmpl	$0, -20(%rbp)
+	je	.L4
+	cmpl	$1, -20(%rbp)
+	je	.L5
+	jmp	.L3
+.L4:
+	movl	$1, -4(%rbp)
+	jmp	.L6
+.L2:
+	movl	$2, -4(%rbp)
+.L5:
+	addl	$1, -4(%rbp)
+	jmp	.L6
+.L3:
+	movl	-20(%rbp), %eax
+	addl	$1, %eax
+	movl	%eax, -4(%rbp)
+.L6:
+	movl	-4(%rbp), %eax
+	popq	%rbp
+	.cfi_def_cfa 7, 8
+	ret
+	.cfi_endproc
+.LFE0:
+	.size	g, .-g
+	.ident	"GCC: (Debian 12.2.0-14+deb12u1) 12.2.0"
+	.section	.note.GNU-stack,"",@progbits
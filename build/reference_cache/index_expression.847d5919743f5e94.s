@@ -0,0 +1,45 @@
+	.file	"index_expression.c"
+	.text
+	.globl	f
+	.type	f, @function
+f:
+.LFB0:
+	.cfi_startproc
+	pushq	%rbp
+	.cfi_def_cfa_offset 16
+	.cfi_offset 6, -16
+	movq	%rsp, %rbp
+	.cfi_def_cfa_register 6
+	movl	$8, -4(%rbp)
+	jmp	.L2
+.L3:
+	movl	-4(%rbp), %eax
+	subl	$8, %eax
+	cltq
+	movl	-4(%rbp), %edx
+	movl	%edx, -48(%rbp,%rax,4)
+	addl	$1, -4(%rbp)
+.L2:
+	cmpl	$15, -4(%rbp)
+	jle	.L3
+	movl	$0, -8(%rbp)
+	movl	$0, -4(%rbp)
+	jmp	.L4
+.L5:
+	movl	-4(%rbp), %eax
+	cltq
+	movl	-48(%rbp,%rax,4), %eax
+	addl	%eax, -8(%rbp)
+	addl	$1, -4(%rbp)
+.L4:
+	cmpl	$7, -4(%rbp)
+	jle	.L5
+	movl	-8(%rbp), %eax
+	popq	%rbp
+	.cfi_def_cfa 7, 8
+	ret
+	.cfi_endproc
+.LFE0:
+	.size	f, .-f
+	.ident	"GCC: (Debian 12.2.0-14+deb12u1) 12.2.0"
+	.section	.note.GNU-stack,"",@progbits
@@ -0,0 +1,44 @@
+	.file	"multiply.c"
+	.text
+	.globl	multiply
+	.type	multiply, @function
+multiply:
+.LFB0:
+	.cfi_startproc
+	pushq	%rbp
+	.cfi_def_cfa_offset 16
+	.cfi_offset 6, -16
+	movq	%rsp, %rbp
+	.cfi_def_cfa_register 6
+	subq	$32, %rsp
+	movl	%edi, -20(%rbp)
+	movl	%esi, -24(%rbp)
+	movl	$0, -4(%rbp)
+	cmpl	$0, -20(%rbp)
+	jns	.L4
+	movl	-20(%rbp), %eax
+	negl	%eax
+	movl	%eax, %edx
+	movl	-24(%rbp), %eax
+	movl	%eax, %esi
+	movl	%edx, %edi
+	call	multiply
+	negl	%eax
+	jmp	.L3
+.L5:
+	movl	-24(%rbp), %eax
+	addl	%eax, -4(%rbp)
+	subl	$1, -20(%rbp)
+.L4:
+	cmpl	$0, -20(%rbp)
+	jg	.L5
+	movl	-4(%rbp), %eax
+.L3:
+	leave
+	.cfi_def_cfa 7, 8
+	ret
+	.cfi_endproc
+.LFE0:
+	.size	multiply, .-multiply
+	.ident	"GCC: (Debian 12.2.0-14+deb12u1) 12.2.0"
+	.section	.note.GNU-stack,"",@progbits
@@ -0,0 +1,40 @@
+	.file	"search.c"
+	.text
+	.globl	search
+	.type	search, @function
+search:
+.LFB0:
+	.cfi_startproc
+	pushq	%rbp
+	.cfi_def_cfa_offset 16
+	.cfi_offset 6, -16
+	movq	%rsp, %rbp
+	.cfi_def_cfa_register 6
+	movq	%rdi, -8(%rbp)
+	movl	%esi, %eax
+	movb	%al, -12(%rbp)
+	jmp	.L2
+.L5:
+	movq	-8(%rbp), %rax
+	movzbl	(%rax), %eax
+	cmpb	%al, -12(%rbp)
+	jne	.L3
+	movq	-8(%rbp), %rax
+	jmp	.L4
+.L3:
+	addq	$1, -8(%rbp)
+.L2:
+	movq	-8(%rbp), %rax
+	movzbl	(%rax), %eax
+	testb	%al, %al
+	jne	.L5
+	movl	$0, %eax
+.L4:
+	popq	%rbp
+	.cfi_def_cfa 7, 8
+	ret
+	.cfi_endproc
+.LFE0:
+	.size	search, .-search
+	.ident	"GCC: (Debian 12.2.0-14+deb12u1) 12.2.0"
+	.section	.note.GNU-stack,"",@progbits
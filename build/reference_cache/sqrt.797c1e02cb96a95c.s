@@ -0,0 +1,56 @@
+	.file	"sqrt.c"
+	.text
+	.globl	bsqrt
+	.type	bsqrt, @function
+bsqrt:
+.LFB0:
+	.cfi_startproc
+	pushq	%rbp
+	.cfi_def_cfa_offset 16
+	.cfi_offset 6, -16
+	movq	%rsp, %rbp
+	.cfi_def_cfa_register 6
+	movl	%edi, -20(%rbp)
+	movl	%esi, -24(%rbp)
+	movl	%edx, -28(%rbp)
+	jmp	.L2
+.L4:
+	movl	-20(%rbp), %edx
+	movl	-24(%rbp), %eax
+	addl	%edx, %eax
+	sarl	%eax
+	movl	%eax, -4(%rbp)
+	movl	-4(%rbp), %eax
+	imull	%eax, %eax
+	movl	%eax, -8(%rbp)
+	movl	-8(%rbp), %eax
+	cmpl	-28(%rbp), %eax
+	jg	.L3
+	movl	-4(%rbp), %eax
+	movl	%eax, -20(%rbp)
+	jmp	.L2
+.L3:
+	movl	-4(%rbp), %eax
+	movl	%eax, -24(%rbp)
+.L2:
+	movl	-20(%rbp), %eax
+	addl	$1, %eax
+	cmpl	%eax, -24(%rbp)
+	jg	.L4
+	movl	-20(%rbp), %eax
+	imull	%eax, %eax
+	cmpl	%eax, -28(%rbp)
+	jle	.L5
+	movl	-24(%rbp), %eax
+	jmp	.L6
+.L5:
+	movl	-20(%rbp), %eax
+.L6:
+	popq	%rbp
+	.cfi_def_cfa 7, 8
+	ret
+	.cfi_endproc
+.LFE0:
+	.size	bsqrt, .-bsqrt
+	.ident	"GCC: (Debian 12.2.0-14+deb12u1) 12.2.0"
+	.section	.note.GNU-stack,"",@progbits
@@ -0,0 +1,34 @@
+	.file	"switch1.c"
+	.text
+	.globl	g
+	.type	g, @function
+g:
+.LFB0:
+	.cfi_startproc
+	pushq	%rbp
+	.cfi_def_cfa_offset 16
+	.cfi_offset 6, -16
+	movq	%rsp, %rbp
+	.cfi_def_cfa_register 6
+	movl	%edi, -4(%rbp)
+	cmpl	$1, -4(%rbp)
+	je	.L2
+	cmpl	$2, -4(%rbp)
+	je	.L3
+	jmp	.L6
+.L2:
+	movl	$10, %eax
+	jmp	.L1
+.L3:
+	movl	$11, %eax
+	jmp	.L1
+.L6:
+.L1:
+	popq	%rbp
+	.cfi_def_cfa 7, 8
+	ret
+	.cfi_endproc
+.LFE0:
+	.size	g, .-g
+	.ident	"GCC: (Debian 12.2.0-14+deb12u1) 12.2.0"
+	.section	.note.GNU-stack,"",@progbits
@@ -0,0 +1,2 @@
+#define N 8
+#include "/root/package/tests/benchmark/scaling/count_words_driver.c"
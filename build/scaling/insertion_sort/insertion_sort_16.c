@@ -0,0 +1,17 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+void insertion_sort(int *a, int n)
+{
+    int i, j;
+    int value;
+
+    for (i = 1; i < n; i++) {
+        value = a[i];
+        j = i - 1;
+        while (j >= 0 && a[j] > value) {
+            a[j + 1] = a[j];
+            j--;
+        }
+        a[j + 1] = value;
+    }
+}
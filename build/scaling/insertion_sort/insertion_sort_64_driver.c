@@ -0,0 +1,2 @@
+#define N 64
+#include "/root/package/tests/benchmark/scaling/insertion_sort_driver.c"
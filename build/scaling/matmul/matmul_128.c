@@ -0,0 +1,25 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+int matmul_trace(int *a, int *b, int *c, int n)
+{
+    int i, j, k;
+    int sum;
+    int trace;
+
+    for (i = 0; i < n; i++) {
+        for (j = 0; j < n; j++) {
+            sum = 0;
+            for (k = 0; k < n; k++) {
+                sum += a[i * n + k] * b[k * n + j];
+            }
+            c[i * n + j] = sum;
+        }
+    }
+
+    trace = 0;
+    for (i = 0; i < n; i++) {
+        trace += c[i * n + i];
+    }
+
+    return trace;
+}
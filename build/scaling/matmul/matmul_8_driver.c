@@ -0,0 +1,2 @@
+#define N 8
+#include "/root/package/tests/benchmark/scaling/matmul_driver.c"
@@ -0,0 +1,32 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+struct particle
+{
+    int x;
+    int y;
+    int vx;
+    int vy;
+};
+
+int update_particles(struct particle *particles, int n, int width)
+{
+    int i;
+    int energy;
+    struct particle *p;
+
+    energy = 0;
+    for (i = 0; i < n; i++) {
+        p = &particles[i];
+        p->x = p->x + p->vx;
+        p->y = p->y + p->vy;
+        if (p->x < 0 || p->x >= width) {
+            p->vx = -p->vx;
+        }
+        if (p->y < 0 || p->y >= width) {
+            p->vy = -p->vy;
+        }
+        energy += p->vx * p->vx + p->vy * p->vy;
+    }
+
+    return energy;
+}
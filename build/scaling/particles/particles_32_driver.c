@@ -0,0 +1,2 @@
+#define N 32
+#include "/root/package/tests/benchmark/scaling/particles_driver.c"
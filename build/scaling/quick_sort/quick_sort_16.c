@@ -0,0 +1,34 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+static void swap(int *a, int *b)
+{
+    int tmp;
+
+    tmp = *a;
+    *a = *b;
+    *b = tmp;
+}
+
+void quick_sort(int *a, int low, int high)
+{
+    int pivot;
+    int i, j;
+
+    if (low >= high) {
+        return;
+    }
+
+    swap(&a[(low + high) / 2], &a[high]);
+    pivot = a[high];
+    i = low;
+    for (j = low; j < high; j++) {
+        if (a[j] < pivot) {
+            swap(&a[i], &a[j]);
+            i++;
+        }
+    }
+    swap(&a[i], &a[high]);
+
+    quick_sort(a, low, i - 1);
+    quick_sort(a, i + 1, high);
+}
@@ -19,22 +19,41 @@ For more information, run ./test.py --help
 __version__ = "1.0.0"
 __author__ = "William Huynh, Filip Wojcicki, James Nock, Quentin Corradi"
 
+import re
+import json
+import random
+import mmap
+import ctypes
+import struct
 import shlex
+import hashlib
+import selectors
 import subprocess
 import xml.sax.saxutils as xml
+import xml.etree.ElementTree as ElementTree
 # switch to process_cpu_count next ubuntu update (python 3.14)
-from os import environ, cpu_count
+from os import (
+    environ, cpu_count, strerror, killpg, read, close, wait4, waitid, waitstatus_to_exitcode, pidfd_open,
+    sched_getaffinity, sched_setaffinity, P_PID, WEXITED, WNOHANG, WNOWAIT, SEEK_END
+)
 from sys import stdout, exit
-from signal import Signals, valid_signals, strsignal
-from shutil import rmtree, move
+from signal import Signals, SIGKILL, valid_signals, strsignal
+from shutil import rmtree, move, which, copyfile
 from pathlib import Path
+from tempfile import TemporaryDirectory, NamedTemporaryFile
+from threading import Condition, Semaphore, Lock
 from argparse import ArgumentParser, Namespace, ArgumentError
 from enum import IntEnum, Enum
-from itertools import chain
-from functools import partial
-from contextlib import nullcontext, ExitStack
+from datetime import datetime
+from math import ceil, floor, log2, sqrt
+from statistics import median
+from time import perf_counter, sleep
+from itertools import chain, islice
+from bisect import bisect_right
+from functools import partial, cache
+from contextlib import contextmanager, nullcontext, AbstractContextManager, ExitStack
 from collections.abc import Callable, Iterator
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from rich.markup import escape as rich_escape
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, SpinnerColumn
@@ -82,10 +101,54 @@ BUILD_DIR_NAME = "build"
 OUTPUT_DIR_NAME = "output"
 TESTS_DIR_NAME = "tests"
 BENCHMARK_DIR_NAME = "benchmark"
+SCALING_BENCHMARK_DIR_NAME = "scaling"
+RESULT_CACHE_FILE_NAME = "result_cache.json"
+TEST_HISTORY_FILE_NAME = "test_history.json"
+STEP_PROFILE_FILE_NAME = "step_profile.jsonl"
+REFERENCE_TIMINGS_FILE_NAME = "reference_timings.json"
+GCC_REFERENCES_FILE_NAME = "gcc_references.json"
+BENCHMARK_HISTORY_FILE_NAME = "benchmark_history.jsonl"
+TEST_COVERAGE_FILE_NAME = "test_coverage.json"
+DRIVER_CACHE_DIR_NAME = "driver_cache"
+REFERENCE_CACHE_DIR_NAME = "reference_cache"
+MATRIX_OUTPUT_DIR_NAME = "matrix"
+OPTIMISED_BUILD_DIR_NAME = "optimised"
+PROFILE_BUILD_DIR_NAME = "profile"
+COMPILER_PROFILE_DIR_NAME = "compiler_profile"
 TIMEOUT_RETURNCODE = 124
+BENCHMARK_WARMUP_RUNS = 3
+BENCHMARK_MIN_SAMPLES = 10
+# Samples taking longer than this times their CPU time likely waited for another process
+NOISY_SAMPLE_RATIO = 1.25
+# Increase of each benchmark metric in percent above which it is considered a regression,
+# simulated instructions and binary sizes are deterministic unlike compilation times
+DEFAULT_REGRESSION_THRESHOLDS = {
+    "compilation_time": 10.0,
+    "simulated_instructions": 0.0,
+    "binary_size": 0.0,
+}
+# Optimisation levels of GCC benchmarks are compared with
+GCC_REFERENCE_LEVELS = ("-O0", "-O1", "-O2")
+# Sizes each scaling benchmark kernel is instantiated with
+SCALING_BENCHMARK_SIZES = (8, 16, 32, 64, 128)
+# Difference with GCC of the exponent of the growth of simulated instructions with the size
+# of a kernel above which it is flagged, allowing for fixed costs weighing more at small sizes
+SCALING_EXPONENT_TOLERANCE = 0.25
+# Median absolute deviations above the median compilation CPU time of tests
+# beyond which a test is listed as an outlier when profiling the compiler
+COMPILER_TIME_OUTLIER_MADS = 5.0
+RISCV_TOOLCHAIN_PREFIX = "riscv32-unknown-elf-"
+# GCC is not targetting rv32imfd (base target of the course) because:
+# rv32imfd is compatible with rv32gc and the C extension is a part of extended goals
+# _zicntr allows for cycles and instructions measurements with rdcycle and rdinstret
+DEFAULT_ISA = "rv32gc_zicntr"
+DEFAULT_ABI = "ilp32d"
 
 class TestStep(Enum):
     REFERENCE = "gcc_reference", "Generating reference assembly"
+    DRIVER = "driver", "Compiling driver"
+    REFERENCE_LINKER = "gcc_linker", "Linking reference"
+    REFERENCE_SIMULATION = "gcc_simulation", "Simulating reference"
     COMPILER = "c_compiler", "Compiling"
     ASSEMBLER = "assembler", "Assembling"
     LINKER = "linker", "Linking"
@@ -97,10 +160,46 @@ class TestStep(Enum):
         obj.action = action
         return obj
 
+# Time limits of test steps in seconds, far above what valid tests take
+DEFAULT_STEP_TIMEOUTS = {step: 60.0 for step in TestStep} | {TestStep.SIMULATION: 10.0}
+# Lower bound of the adaptive simulation time limit, so that load doesn't make tests time out
+MIN_ADAPTIVE_SIMULATION_TIMEOUT = 2.0
+
+
+class Simulator(Enum):
+    """Simulators of RISC-V executables, by executable name."""
+    SPIKE = "spike"
+    # Emulates Linux system calls in user mode, which match those of newlib, so it runs
+    # the executables without pk and much faster, but rdinstret then reads a host timer
+    QEMU = "qemu-riscv32"
+
+    @property
+    def counts_instructions(self) -> bool:
+        """Whether rdinstret returns the instructions simulated, which benchmarks rely on."""
+        return self is Simulator.SPIKE
+
+    def get_cmd(self, isa: str, executable: Path) -> list[str | Path]:
+        """Command simulating `executable` for the architecture `isa`."""
+        if self is Simulator.SPIKE:
+            return ["spike", f"--isa={isa}", "pk", executable]
+        # Its default CPU has all the standard extensions of the architectures tests are compiled for
+        return ["qemu-riscv32", executable]
+
+# Tests whose reference is simulated with both simulators before using another one than spike
+SIMULATOR_CHECK_SAMPLE_SIZE = 5
+
 
 class MakeRule(Enum):
     CLEAN = "clean", "Cleaning project"
     BUILD = f"{BUILD_DIR_NAME}/{TestStep.COMPILER.value}", "Building compiler"
+    # Optimised without sanitizers or coverage, built next to the default one
+    OPTIMISED_BUILD = (
+        f"{BUILD_DIR_NAME}/{OPTIMISED_BUILD_DIR_NAME}/{TestStep.COMPILER.value}", "Building optimised compiler"
+    )
+    # Optimised and instrumented for gprof, built next to the default one
+    PROFILE_BUILD = (
+        f"{BUILD_DIR_NAME}/{PROFILE_BUILD_DIR_NAME}/{TestStep.COMPILER.value}", "Building profiling compiler"
+    )
     COVERAGE = "coverage", "Processing coverage data"
 
     def __new__(cls, value: str, action: str):
@@ -127,17 +226,220 @@ def append_suffix_to_stem(stem: Path, suffix: str) -> Path:
 def get_logs_from_stem(stem: Path) -> tuple[Path, Path]:
     return tuple(append_suffix_to_stem(stem, f"{s}.log") for s in ("stdout", "stderr"))
 
-def run_subprocess(cmd: list[str | Path], log_stem: Path | None, **kwargs) -> int:
+class ProcessGroups:
+    """
+    Process groups of the running subprocesses, each started in its own session,
+    so that all of them (including their children, like pk under spike) can be killed at once.
+    """
+    def __init__(self):
+        self._lock = Lock()
+        self._processes = set()
+        self._cancelled = False
+
+    def start(self, cmd: list[str | Path], **kwargs) -> subprocess.Popen | None:
+        """Starts a process in its own group, unless cancelled, in which case returns None."""
+        with self._lock:
+            if self._cancelled:
+                return None
+            process = subprocess.Popen(cmd, start_new_session=True, **kwargs)
+            self._processes.add(process)
+            return process
+
+    def kill(self, process: subprocess.Popen):
+        """Kills the group of a process started by `start`, which still has to be waited for."""
+        try:
+            killpg(process.pid, SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    def finish(self, process: subprocess.Popen):
+        with self._lock:
+            self._processes.discard(process)
+
+    def cancel(self):
+        """Kills all running process groups and prevents new processes from starting."""
+        with self._lock:
+            self._cancelled = True
+            processes = list(self._processes)
+        for process in processes:
+            self.kill(process)
+
+process_groups = ProcessGroups()
+
+class ProcessUsage():
+    """
+    Resources used by a process: wall, user and system times (in s).
+
+    The peak RSS isn't recorded, as Linux carries the peak RSS of the parent over to its forked
+    child, so that of every step would be at least that of this script.
+    """
+    def __init__(self, wall_time: float, user_time: float, system_time: float):
+        self.wall_time = wall_time
+        self.user_time = user_time
+        self.system_time = system_time
+
+    def split(self, count: int) -> "ProcessUsage":
+        """Share of each of `count` programs run by the process."""
+        return ProcessUsage(self.wall_time / count, self.user_time / count, self.system_time / count)
+
+    def to_json(self) -> dict:
+        return {
+            "wall_time": self.wall_time,
+            "user_time": self.user_time,
+            "system_time": self.system_time,
+        }
+
+def wait_process_exit(process: subprocess.Popen, timeout: float) -> bool:
+    """
+    Waits at most `timeout` seconds for a process to exit, without reaping it.
+    Waits on a file descriptor of the process so that its exit is noticed immediately,
+    or polls it if not supported.
+
+    Returns whether the process exited.
+    """
+    try:
+        pidfd = pidfd_open(process.pid)
+    except OSError:
+        deadline = perf_counter() + timeout
+        delay = 0.0005
+        while waitid(P_PID, process.pid, WEXITED | WNOHANG | WNOWAIT) is None:
+            if (remaining := deadline - perf_counter()) <= 0:
+                return False
+            delay = min(delay * 2, remaining, 0.05)
+            sleep(delay)
+        return True
+
+    try:
+        with selectors.DefaultSelector() as selector:
+            selector.register(pidfd, selectors.EVENT_READ)
+            return bool(selector.select(timeout))
+    finally:
+        close(pidfd)
+
+def wait_process(process: subprocess.Popen, timeout: float | None = None) -> tuple[int, ProcessUsage]:
+    """
+    Waits for a process like `Popen.wait`, measuring the resources it used with `os.wait4`.
+    The wall time is measured since the call.
+
+    Returns a tuple of (return code, usage), or raises subprocess.TimeoutExpired
+    and leaves the process running after `timeout` seconds.
+    """
+    start_time = perf_counter()
+    if timeout is not None and not wait_process_exit(process, timeout):
+        raise subprocess.TimeoutExpired(process.args, timeout)
+    _, status, rusage = wait4(process.pid, 0)
+    process.returncode = waitstatus_to_exitcode(status)
+    return process.returncode, ProcessUsage(
+        perf_counter() - start_time, rusage.ru_utime, rusage.ru_stime
+    )
+
+class BoundedOutput():
+    """
+    Output of a process capped to about `limit` bytes by keeping only its beginning and its end,
+    so that a runaway process can't fill the memory or the disk.
+    """
+    def __init__(self, limit: int):
+        self._half_limit = limit // 2
+        self._head = bytearray()
+        self._tail = bytearray()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data: bytes):
+        self._size += len(data)
+        if (head_room := self._half_limit - len(self._head)) > 0:
+            self._head += data[:head_room]
+            data = data[head_room:]
+        self._tail += data
+        if len(self._tail) > self._half_limit:
+            del self._tail[:len(self._tail) - self._half_limit]
+
+    def getvalue(self) -> bytes:
+        if (truncated := self._size - len(self._head) - len(self._tail)) == 0:
+            return bytes(self._head + self._tail)
+        return bytes(self._head + f"\n[... {truncated} bytes truncated ...]\n".encode() + self._tail)
+
+def read_outputs(process: subprocess.Popen, outputs: tuple[BoundedOutput, BoundedOutput], deadline: float | None = None):
+    """
+    Reads the stdout and stderr pipes of a process into `outputs` until they are closed,
+    skipping those already read to the end, e.g. by a previous call.
+
+    Raises subprocess.TimeoutExpired if they are still open at `deadline` (see `perf_counter`).
+    """
+    with selectors.DefaultSelector() as selector:
+        for pipe, output in zip((process.stdout, process.stderr), outputs):
+            if not pipe.closed:
+                selector.register(pipe, selectors.EVENT_READ, output)
+        while selector.get_map():
+            timeout = None if deadline is None else deadline - perf_counter()
+            if timeout is not None and timeout <= 0:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+            for key, _ in selector.select(timeout):
+                if data := read(key.fd, 1 << 16):
+                    key.data.write(data)
+                else:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+
+def run_measured_subprocess(
+    cmd: list[str | Path],
+    log_stem: Path | None,
+    timeout: float | None = None,
+    log_limit: int | None = None,
+    **kwargs
+) -> tuple[int, ProcessUsage | None]:
+    """
+    Runs a command in its own process group, logging its output to `<log_stem>.std(out/err).log`.
+    If `log_limit` is given, the output is captured keeping at most about that many bytes
+    of each stream (see `BoundedOutput`), and it is only logged if it isn't empty or the command fails.
+
+    Returns a tuple of (return code, usage), without usage if the command didn't start.
+    """
+    capture = log_stem is not None and log_limit is not None
     with ExitStack() as stack:
-        stdout, stderr = (
-            tuple(stack.enter_context(path.open("w")) for path in get_logs_from_stem(log_stem))
-            if log_stem is not None
-            else (None, None)
-        )
+        if capture:
+            outputs = (BoundedOutput(log_limit), BoundedOutput(log_limit))
+            stdout = stderr = subprocess.PIPE
+        else:
+            stdout, stderr = (
+                tuple(stack.enter_context(path.open("w")) for path in get_logs_from_stem(log_stem))
+                if log_stem is not None
+                else (None, None)
+            )
+        start_time = perf_counter()
+        deadline = None if timeout is None else start_time + timeout
+        if (process := process_groups.start(cmd, stdout=stdout, stderr=stderr, **kwargs)) is None:
+            return -SIGKILL, None
         try:
-            return subprocess.run(cmd, stdout=stdout, stderr=stderr, **kwargs).returncode
+            if capture:
+                read_outputs(process, outputs, deadline)
+            return_code, usage = wait_process(
+                process, timeout=None if deadline is None else max(0.0, deadline - perf_counter())
+            )
         except subprocess.TimeoutExpired:
-            return TIMEOUT_RETURNCODE
+            process_groups.kill(process)
+            if capture:
+                read_outputs(process, outputs)
+            _, usage = wait_process(process)
+            return_code = TIMEOUT_RETURNCODE
+        except BaseException:
+            # Not being in the terminal process group, it doesn't get interrupted with us
+            process_groups.kill(process)
+            raise
+        finally:
+            process_groups.finish(process)
+
+    if capture:
+        for path, output in zip(get_logs_from_stem(log_stem), outputs):
+            if output or return_code != 0:
+                path.write_bytes(output.getvalue())
+    usage.wall_time = perf_counter() - start_time
+    return return_code, usage
+
+def run_subprocess(cmd: list[str | Path], log_stem: Path | None, **kwargs) -> int:
+    return run_measured_subprocess(cmd, log_stem, **kwargs)[0]
 
 def run_make_rule(
     rule: MakeRule,
@@ -145,24 +447,33 @@ def run_make_rule(
     verbosity: Verbosity = Verbosity.NORMAL,
     jobs: int = 1,
     optimise: bool = False,
+    background: bool = False,
     **kwargs
 ) -> bool:
     """
     Wrapper for `make <rule>`.
+    If `background` is set, no status spinner is displayed while it runs, as something else is.
 
     Returns True if successful, False otherwise.
     """
     quiet = verbosity > reporter.verbosity
+    separate_build = rule in (MakeRule.OPTIMISED_BUILD, MakeRule.PROFILE_BUILD)
+    variables = [f"{'N' if optimise or separate_build else ''}DEBUG=1"]
+    if separate_build:
+        variables.append(f"BUILD_DIR={Path(rule.value).parent}")
+    if rule is MakeRule.PROFILE_BUILD:
+        variables.append("PROFILE=1")
     cmd = [
         "make",
         f"-j{jobs}",
         "-s" if quiet else "-Oline",
         "-C", root_dir,
-        f"{'N' if optimise else ''}DEBUG=1",
+        *variables,
         rule.value
     ]
 
-    with reporter.status(rule.action, verbosity=verbosity):
+    # A spinner can't be displayed alongside another one, unlike a message
+    with reporter.status(rule.action, verbosity=verbosity) if not (background and quiet) else nullcontext():
         return_code = run_subprocess(
             cmd=cmd,
             log_stem=(root_dir / f"make_{rule.value.replace('/', '_')}") if quiet else None,
@@ -173,7 +484,7 @@ def run_make_rule(
         return True
 
     # Clean version of the command for students to quickly retry the failing rule
-    failed_cmd_str = shlex.join(["make"] + cmd[-2:])
+    failed_cmd_str = shlex.join(["make", *variables, rule.value])
     reporter.error(
         f"{get_return_code_msg(return_code)} when {rule.action.lower()} with `{failed_cmd_str}`."
     )
@@ -194,47 +505,215 @@ class TestError:
     def get_short_message(self) -> str:
         return self._short_message
 
+    def get_files(self) -> list[Path]:
+        return self._files
+
+    def to_json(self) -> dict:
+        return {"message": self._short_message, "files": [str(file) for file in self._files]}
+
+    def relocate(self, source_dir: Path, destination_dir: Path) -> "TestError":
+        """Returns the same error with files (and paths in the message) moved to another directory."""
+        return TestError(
+            short_message=self._short_message.replace(
+                get_relative_path_str(source_dir), get_relative_path_str(destination_dir)
+            ),
+            files=[
+                destination_dir / file.relative_to(source_dir) if file.is_relative_to(source_dir) else file
+                for file in self._files
+            ]
+        )
+
+    @classmethod
+    def from_json(cls, data: dict) -> "TestError":
+        return cls(short_message=data["message"], files=[Path(file) for file in data["files"]])
+
     def get_message_with_file_list(self) -> str:
         return "".join(chain(
             [self._short_message, ", see:\n"],
             (f"\t{get_relative_path_str(file)}\n" for file in self._files)
         ))
 
-    def get_message_with_file_content(self) -> str:
+    def get_message_with_file_content(self, limit: int | None = None) -> str:
+        """Includes the content of files, truncated to about `limit` bytes each if given."""
         return "".join(chain(
             [self._short_message, ".\n"],
-            (f"\t{get_relative_path_str(file)}:\n{file.read_text()}:\n" for file in self._files)
+            (
+                f"\t{get_relative_path_str(file)}:\n{read_text_truncated(file, limit)}:\n"
+                for file in self._files
+            )
         ))
 
+def read_text_truncated(path: Path, limit: int | None = None) -> str:
+    """
+    Reads a text file, keeping only about `limit` bytes from its beginning and end if given,
+    without reading the rest.
+    """
+    try:
+        with path.open("rb") as file:
+            if limit is None or (size := file.seek(0, SEEK_END)) <= limit:
+                file.seek(0)
+                content = file.read()
+            else:
+                file.seek(0)
+                head = file.read(limit // 2)
+                file.seek(-(limit // 2), SEEK_END)
+                truncated = size - 2 * (limit // 2)
+                content = head + f"\n[... {truncated} bytes truncated ...]\n".encode() + file.read()
+    except FileNotFoundError:
+        return "(missing)"
+    return content.decode(errors="replace")
+
 def get_sanitizer_files_from_stem_parent(stem: Path) -> Iterator[Path]:
     return stem.parent.glob("*.*san.log.*")
 
-def run_test_step(
+class StepSlots:
+    """
+    Limits the number of steps running at the same time to `jobs`,
+    and optionally the number of instances of some steps to fewer jobs given by `step_jobs`,
+    so that tests can overlap their steps without overloading the machine.
+    """
+    def __init__(self, jobs: int, step_jobs: dict[TestStep, int] | None = None):
+        self._all_steps = Semaphore(jobs)
+        self._steps = {step: Semaphore(min(jobs, n)) for step, n in (step_jobs or {}).items()}
+
+    @contextmanager
+    def __call__(self, step: TestStep):
+        with self._steps.get(step, nullcontext()), self._all_steps:
+            yield
+
+def get_percentile(sorted_values: list[float], percent: float) -> float:
+    """Nearest-rank percentile of a non-empty sorted list."""
+    return sorted_values[max(0, ceil(percent / 100 * len(sorted_values)) - 1)]
+
+class StepProfile():
+    """
+    Resources used by each test step, appended to a JSON Lines file as steps complete,
+    and kept to get the time spent running each test and a summary per step.
+    The file is started anew when first entered, then appended to by later runs of tests.
+    """
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = Lock()
+        self._file = None
+        self._entered = False
+        self._test_times = {}
+        self._step_usages = {}
+
+    def __enter__(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self._path.open("a" if self._entered else "w", encoding="utf-8")
+        self._entered = True
+        return self
+
+    def record(self, output_stem: Path, step: TestStep, return_code: int, usage: ProcessUsage):
+        test = get_test_name(output_stem)
+        with self._lock:
+            # By output stem, as the same test can run in several configurations at once
+            self._test_times[output_stem] = self._test_times.get(output_stem, 0.0) + usage.wall_time
+            self._step_usages.setdefault(step, []).append(usage)
+            self._file.write(json.dumps({
+                "test": test,
+                "step": step.value,
+                "return_code": return_code,
+                **usage.to_json(),
+            }) + "\n")
+
+    def pop_test_time(self, output_stem: Path) -> float:
+        """Returns the time spent running the steps of a test with `output_stem` since last called for it."""
+        with self._lock:
+            return self._test_times.pop(output_stem, 0.0)
+
+    def get_summary(self) -> list[str]:
+        """Describes the distribution of wall times and CPU times of each step."""
+        total_time = sum(usage.wall_time for usages in self._step_usages.values() for usage in usages)
+        summary = []
+        for step in TestStep:
+            if not (usages := self._step_usages.get(step)):
+                continue
+            wall_times = sorted(usage.wall_time for usage in usages)
+            step_time = sum(wall_times)
+            summary.append(
+                f"{step.value}: {len(usages)} runs, "
+                f"{step_time:.2f} s ({100 * step_time / (total_time or 1):.0f}%), "
+                + ", ".join(
+                    f"p{percent} = {get_percentile(wall_times, percent):.3f} s"
+                    for percent in (50, 90, 99)
+                )
+                + f", max = {wall_times[-1]:.3f} s, "
+                f"user = {sum(usage.user_time for usage in usages):.2f} s, "
+                f"system = {sum(usage.system_time for usage in usages):.2f} s"
+            )
+        return summary
+
+    def __exit__(self, *_):
+        self._file.close()
+
+def run_measured_test_step(
     step: TestStep,
     cmd: list[str | Path],
     log_stem: Path,
+    slots: StepSlots | None = None,
+    profile: StepProfile | None = None,
+    timeouts: dict[TestStep, float] | None = None,
     **kwargs
-) -> TestError | None:
+) -> tuple[TestError | None, ProcessUsage | None]:
     """
-    Runs one compiler testing step.
+    Runs one compiler testing step, once one of the `slots` for it is available if given.
+    The step is killed after the time limit given for it in `timeouts`, if any.
+    Records the resources it used in `profile` if given.
     On error links additional relevant output files.
 
+    Returns a tuple of (None if successful or a TestError otherwise, usage).
+    """
+    timeout = None if timeouts is None else timeouts.get(step)
+    with slots(step) if slots is not None else nullcontext():
+        return_code, usage = run_measured_subprocess(
+            cmd, log_stem=append_suffix_to_stem(log_stem, step.value), timeout=timeout, **kwargs
+        )
+    if profile is not None and usage is not None:
+        profile.record(log_stem, step, return_code, usage)
+
+    return get_test_step_error(step, cmd, log_stem, return_code, timeout), usage
+
+def run_test_step(*args, **kwargs) -> TestError | None:
+    """
+    Runs one compiler testing step, see `run_measured_test_step`.
+
     Returns None if successful, a TestError otherwise.
     """
+    return run_measured_test_step(*args, **kwargs)[0]
 
-    component_log_stem = append_suffix_to_stem(log_stem, step.value)
-    return_code = run_subprocess(cmd, log_stem=component_log_stem, **kwargs)
+def get_test_step_error(
+    step: TestStep,
+    cmd: list[str | Path],
+    log_stem: Path,
+    return_code: int,
+    timeout: float | None = None
+) -> TestError | None:
+    """
+    Describes the outcome of a compiler testing step that has been run,
+    with the time limit it was given if any.
+    On error links additional relevant output files.
 
+    Returns None if successful, a TestError otherwise.
+    """
     if return_code == 0:
         return None
 
+    component_log_stem = append_suffix_to_stem(log_stem, step.value)
+
     error_msg = get_return_code_msg(return_code)
+    if return_code == TIMEOUT_RETURNCODE and timeout is not None:
+        error_msg += f" after {timeout:.3g} s"
     files = list(get_logs_from_stem(component_log_stem))
     # All passes after student compiler should add files to refer to
     # I tried to link them in the order students should inspect them
     # If the compiler succeeded and a further step failed, it is likely caused by the compiler
     # so we should link the compiler outputs, in particular the produced assembly (see below)
-    if step is not TestStep.REFERENCE:
+    # Steps that don't depend on the student compiler are not concerned
+    if step not in (
+        TestStep.REFERENCE, TestStep.DRIVER, TestStep.REFERENCE_LINKER, TestStep.REFERENCE_SIMULATION
+    ):
         # If the compiler output is present add it with the reference to compare to;
         # if the compiler failed we don't expect it but link it if present,
         # otherwise it's probably the reason of the failure,
@@ -245,7 +724,11 @@ def run_test_step(
                 files.append(asm_file)
             # Don't link it if it failed, don't need to duplicate link std(out/err)
         else:
-            files.extend(get_logs_from_stem(append_suffix_to_stem(log_stem, TestStep.COMPILER.value)))
+            # Logs of successful steps are only written if not empty
+            files.extend(
+                log for log in get_logs_from_stem(append_suffix_to_stem(log_stem, TestStep.COMPILER.value))
+                if log.is_file()
+            )
             if asm_file.is_file():
                 files.append(asm_file)
             else:
@@ -272,6 +755,447 @@ def run_test_step(
         files=files
     )
 
+def hash_file(path: Path) -> str:
+    """Hashes the content of a file (SHA-256)."""
+    with path.open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()
+
+@cache
+def get_toolchain_fingerprint(tools: tuple[str, ...] = ("riscv32-unknown-elf-gcc", "spike")) -> str:
+    """
+    Identifies the installed version of each tool from its resolved executable,
+    without spawning it (a toolchain update replaces the binaries).
+    """
+    fingerprint = []
+    for tool in tools:
+        if (tool_path := which(tool)) is None:
+            fingerprint.append(f"{tool}=missing")
+            continue
+        stat = Path(tool_path).resolve().stat()
+        fingerprint.append(f"{tool}={tool_path}:{stat.st_size}:{stat.st_mtime_ns}")
+    return ";".join(fingerprint)
+
+def get_driver_dependencies(driver_file: Path) -> list[Path]:
+    """
+    Returns the driver with the files it depends on: the headers next to it, and the files it
+    includes with quotes, recursively (e.g. the template of a generated scaling benchmark).
+    """
+    dependencies = {driver_file.resolve()} | {header.resolve() for header in driver_file.parent.glob("*.h")}
+    files_to_scan = list(dependencies)
+    while files_to_scan:
+        file = files_to_scan.pop()
+        includes = re.findall(r'^\s*#\s*include\s+"([^"]+)"', file.read_text(errors="replace"), re.MULTILINE)
+        for include in includes:
+            included_file = (file.parent / include).resolve()
+            if included_file.is_file() and included_file not in dependencies:
+                dependencies.add(included_file)
+                files_to_scan.append(included_file)
+    return sorted(dependencies)
+
+def get_driver_object(driver_file: Path, gcc_cmd: list[str], cache_dir: Path) -> Path:
+    """
+    Path of the cached object of a driver, named after a hash of everything it depends on:
+    the driver and its dependencies (see `get_driver_dependencies`), the compilation flags
+    and the compiler.
+    """
+    digest = hashlib.sha256()
+    digest.update(shlex.join(gcc_cmd).encode())
+    digest.update(get_toolchain_fingerprint().encode())
+    for file in get_driver_dependencies(driver_file):
+        digest.update(hash_file(file).encode())
+    return cache_dir / f"{driver_file.stem}.{digest.hexdigest()[:16]}.o"
+
+def compile_driver(
+    driver_file: Path,
+    driver_object: Path,
+    gcc_cmd: list[str],
+    log_stem: Path,
+    **kwargs
+) -> TestError | None:
+    """
+    Compiles a driver into its cached object, unless it is already there.
+    Additional arguments are passed to `run_test_step`.
+
+    Returns None if successful, a TestError otherwise.
+    """
+    if driver_object.is_file():
+        return None
+
+    # Compile next to the cached object, on the same filesystem unlike a scratch directory,
+    # then move it so the cached object is never partially written
+    driver_object.parent.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(dir=driver_object.parent, suffix=".o", delete=False) as file:
+        temporary_object = Path(file.name)
+    if (error := run_test_step(
+        step=TestStep.DRIVER,
+        cmd=gcc_cmd + ["-c", driver_file, "-o", temporary_object],
+        log_stem=log_stem,
+        **kwargs
+    )) is not None:
+        temporary_object.unlink(missing_ok=True)
+        return error
+
+    temporary_object.replace(driver_object)
+    return None
+
+def adapt_simulation_timeout(
+    driver_file: Path,
+    output_stem: Path,
+    driver_object: Path,
+    gcc_cmd: list[str],
+    isa: str,
+    reference_timings: "ReferenceTimings",
+    factor: float,
+    timeouts: dict[TestStep, float],
+    generate_reference: Callable[[], TestError | None] | None = None,
+    simulator: Simulator = Simulator.SPIKE,
+    **kwargs
+) -> TestError | None:
+    """
+    Limits the simulation of a test in `timeouts` to `factor` times the simulation time of
+    its reference, within the time limit already there. The reference is simulated the first time,
+    after being generated with `generate_reference` if given, and its time stored in `reference_timings`.
+    Additional arguments are passed to `run_test_step`.
+
+    Returns None if successful, a TestError otherwise.
+    """
+    if (reference_time := reference_timings.get(driver_file)) is None:
+        if generate_reference is not None and (error := generate_reference()) is not None:
+            return error
+
+        reference_executable = append_suffix_to_stem(output_stem, "gcc")
+        if (error := run_test_step(
+            step=TestStep.REFERENCE_LINKER,
+            cmd=gcc_cmd + [
+                "-static", append_suffix_to_stem(output_stem, "gcc.s"), driver_object,
+                "-o", reference_executable
+            ],
+            log_stem=output_stem,
+            timeouts=timeouts,
+            **kwargs
+        )) is not None:
+            return error
+
+        error, usage = run_measured_test_step(
+            step=TestStep.REFERENCE_SIMULATION,
+            cmd=simulator.get_cmd(isa, reference_executable),
+            log_stem=output_stem,
+            timeouts=timeouts,
+            **kwargs
+        )
+        if error is not None:
+            return error
+        reference_time = usage.wall_time
+        reference_timings.put(driver_file, reference_time)
+
+    timeout = max(MIN_ADAPTIVE_SIMULATION_TIMEOUT, factor * reference_time)
+    if (limit := timeouts.get(TestStep.SIMULATION)) is not None:
+        timeout = min(timeout, limit)
+    timeouts[TestStep.SIMULATION] = timeout
+    return None
+
+class BatchedTest():
+    """A test prepared to be simulated in a batch, see `SimulationBatcher`."""
+    def __init__(
+        self,
+        output_stem: Path,
+        batch_object: Path,
+        symbol: str,
+        timeouts: dict[TestStep, float] | None = None
+    ):
+        self.output_stem = output_stem
+        self.batch_object = batch_object
+        self.symbol = symbol
+        self.timeouts = timeouts or {}
+        self.return_code = None
+        self.done = False
+
+class SimulationBatcher():
+    """
+    Simulates up to `batch_size` tests in a single simulator session,
+    as booting spike and pk takes longer than running most tests.
+
+    The main of each test is renamed and made its only global symbol beforehand,
+    so that tests can be linked together with a generated main calling them one after the other.
+    Their outputs are then split back using markers printed around each test.
+    The resources used by the simulation of a batch are shared between its tests in `profile`,
+    and the output of each test is limited to `log_limit` bytes per stream like other steps.
+    A batch is given the longest simulation time limit of its tests, as the tests it doesn't
+    complete are simulated on their own anyway.
+    """
+    MARKER = "@@test.py batch@@"
+
+    def __init__(
+        self,
+        batch_size: int,
+        expected_tests: int,
+        linger: float = 1.0,
+        profile: StepProfile | None = None,
+        log_limit: int | None = None
+    ):
+        self._batch_size = batch_size
+        self._expected_tests = expected_tests
+        self._linger = linger
+        self._profile = profile
+        self._log_limit = log_limit
+        self._condition = Condition()
+        self._pending = {}
+
+    def skip(self, count: int = 1):
+        """Signals that some of the expected tests won't be simulated, so batches don't wait for them."""
+        with self._condition:
+            self._expected_tests -= count
+            self._condition.notify_all()
+
+    def simulate(
+        self,
+        test: BatchedTest,
+        gcc_cmd: list[str],
+        isa: str,
+        slots: StepSlots | None = None,
+        simulator: Simulator = Simulator.SPIKE
+    ) -> int | None:
+        """
+        Simulates one of the expected tests as part of a batch with `simulator`,
+        and writes its simulation logs.
+        Only tests with the same `gcc_cmd`, `isa` and `simulator` are batched together.
+        Linking and simulating the batch takes the `slots` of these steps if given.
+        A batch is simulated once full, once no other expected test can join it,
+        or once no test has joined it for `linger` seconds.
+
+        Returns the exit code of the test, or None if it didn't complete in its batch.
+        """
+        key = (simulator, isa, tuple(gcc_cmd))
+        with self._condition:
+            self._expected_tests -= 1
+            pending = self._pending.setdefault(key, [])
+            pending.append(test)
+            self._condition.notify_all()
+            while (
+                pending is self._pending.get(key)
+                and len(pending) < self._batch_size
+                and self._expected_tests > 0
+            ):
+                if not self._condition.wait(timeout=self._linger):
+                    break
+            # Another test took the batch, wait for it to be simulated
+            if pending is not self._pending.get(key):
+                self._condition.wait_for(lambda: test.done)
+                return test.return_code
+            batch = self._pending.pop(key)
+
+        try:
+            # Simulating a single test together with the generated main isn't worth it
+            if len(batch) > 1:
+                self._run_batch(batch, gcc_cmd, isa, slots or (lambda _: nullcontext()), simulator)
+        finally:
+            with self._condition:
+                for batched_test in batch:
+                    batched_test.done = True
+                self._condition.notify_all()
+        return test.return_code
+
+    def _get_main(self, batch: list[BatchedTest]) -> str:
+        marker = json.dumps(self.MARKER)
+        return "".join(chain(
+            ["#include <stdio.h>\n\n"],
+            (f"int {test.symbol}(void);\n" for test in batch),
+            ["\nstatic int (*const tests[])(void) = {\n"],
+            (f"    {test.symbol},\n" for test in batch),
+            ["};\n\n",
+             "int main(void)\n",
+             "{\n",
+             "    int i, result;\n",
+             f"    for (i = 0; i < {len(batch)}; i++) {{\n",
+             f"        printf(\"%sbegin %d\\n\", {marker}, i);\n",
+             f"        fprintf(stderr, \"%sbegin %d\\n\", {marker}, i);\n",
+             "        fflush(stdout);\n",
+             "        result = tests[i]();\n",
+             "        fflush(stdout);\n",
+             f"        printf(\"\\n%send %d %d\\n\", {marker}, i, result);\n",
+             f"        fprintf(stderr, \"\\n%send %d\\n\", {marker}, i);\n",
+             "        fflush(stdout);\n",
+             "    }\n",
+             "    return 0;\n",
+             "}\n"],
+        ))
+
+    def _run_batch(
+        self,
+        batch: list[BatchedTest],
+        gcc_cmd: list[str],
+        isa: str,
+        slots: Callable[[TestStep], AbstractContextManager],
+        simulator: Simulator
+    ):
+        def get_timeout(step: TestStep) -> float | None:
+            timeouts = [test.timeouts.get(step) for test in batch]
+            return None if None in timeouts else max(timeouts)
+
+        with TemporaryDirectory(prefix="batch_") as batch_dir:
+            batch_stem = Path(batch_dir) / "batch"
+            main_file = append_suffix_to_stem(batch_stem, "c")
+            main_file.write_text(self._get_main(batch))
+            with slots(TestStep.LINKER):
+                if run_subprocess(
+                    cmd=gcc_cmd + ["-static", main_file]
+                        + [test.batch_object for test in batch] + ["-o", batch_stem],
+                    log_stem=append_suffix_to_stem(batch_stem, TestStep.LINKER.value),
+                    timeout=get_timeout(TestStep.LINKER)
+                ) != 0:
+                    return
+
+            # The exit code of the batch doesn't matter, only the tests that completed do
+            simulation_stem = append_suffix_to_stem(batch_stem, TestStep.SIMULATION.value)
+            with slots(TestStep.SIMULATION):
+                _, usage = run_measured_subprocess(
+                    simulator.get_cmd(isa, batch_stem),
+                    log_stem=simulation_stem,
+                    timeout=get_timeout(TestStep.SIMULATION),
+                    log_limit=None if self._log_limit is None else self._log_limit * len(batch)
+                )
+            stdout_log, stderr_log = (
+                log.read_bytes() if log.is_file() else b""
+                for log in get_logs_from_stem(simulation_stem)
+            )
+
+            # Printing the end markers adds a newline in case the test output doesn't end with one
+            marker = re.escape(self.MARKER.encode())
+            stdouts = {
+                int(index): (output, int(return_code))
+                for index, output, return_code in re.findall(
+                    marker + rb"begin (\d+)\n(.*?)\n" + marker + rb"end \1 (-?\d+)\n",
+                    stdout_log,
+                    flags=re.DOTALL
+                )
+            }
+            stderrs = {
+                int(index): output
+                for index, output in re.findall(
+                    marker + rb"begin (\d+)\n(.*?)\n" + marker + rb"end \1\n",
+                    stderr_log,
+                    flags=re.DOTALL
+                )
+            }
+
+        for index, test in enumerate(batch):
+            if index not in stdouts:
+                continue
+            output, return_code = stdouts[index]
+            # Like the exit status of a process
+            test.return_code = return_code & 0xFF
+            test_logs = get_logs_from_stem(append_suffix_to_stem(test.output_stem, TestStep.SIMULATION.value))
+            for log, content in zip(test_logs, (output, stderrs.get(index, b""))):
+                if self._log_limit is not None:
+                    if not content and test.return_code == 0:
+                        continue
+                    bounded_content = BoundedOutput(self._log_limit)
+                    bounded_content.write(content)
+                    content = bounded_content.getvalue()
+                log.write_bytes(content)
+            if self._profile is not None and usage is not None:
+                self._profile.record(
+                    test.output_stem, TestStep.SIMULATION, test.return_code, usage.split(len(stdouts))
+                )
+
+def simulate_batched_test(
+    output_stem: Path,
+    driver_object: Path,
+    gcc_cmd: list[str],
+    isa: str,
+    batcher: SimulationBatcher,
+    slots: StepSlots | None = None,
+    timeouts: dict[TestStep, float] | None = None,
+    simulator: Simulator = Simulator.SPIKE,
+    **kwargs
+) -> TestError | None:
+    """
+    Simulates a test as part of a batch of tests, falling back to simulating it on its own
+    if it can't be prepared for batching or doesn't complete in its batch
+    (e.g. it calls exit or crashes, or another test of its batch crashes before it).
+    Additional arguments are passed to `run_test_step`.
+
+    Returns None if successful, a TestError otherwise.
+    """
+    cmd = simulator.get_cmd(isa, output_stem)
+
+    # Link the test with its driver, rename its main to make it unique and keep only that global
+    batch_object = append_suffix_to_stem(output_stem, "batch.o")
+    symbol = "__test_" + re.sub(r"\W", "_", f"{output_stem.parent.parent.name}_{output_stem.name}")
+    link_timeout = None if timeouts is None else timeouts.get(TestStep.LINKER)
+    with slots(TestStep.LINKER) if slots is not None else nullcontext():
+        prepared = run_subprocess(
+            cmd=[
+                f"{RISCV_TOOLCHAIN_PREFIX}ld", "-r", "-d", # -d allocates common symbols to make them local
+                append_suffix_to_stem(output_stem, "o"), driver_object,
+                "-o", batch_object
+            ],
+            log_stem=append_suffix_to_stem(output_stem, "batch.ld"),
+            timeout=link_timeout,
+            log_limit=kwargs.get("log_limit")
+        ) == 0 and run_subprocess(
+            cmd=[
+                f"{RISCV_TOOLCHAIN_PREFIX}objcopy",
+                "--redefine-sym", f"main={symbol}",
+                "--keep-global-symbol", symbol,
+                batch_object
+            ],
+            log_stem=append_suffix_to_stem(output_stem, "batch.objcopy"),
+            timeout=link_timeout,
+            log_limit=kwargs.get("log_limit")
+        ) == 0
+
+    if not prepared:
+        batcher.skip()
+    elif (return_code := batcher.simulate(
+        BatchedTest(output_stem, batch_object, symbol, timeouts), gcc_cmd, isa, slots, simulator
+    )) is not None:
+        return get_test_step_error(TestStep.SIMULATION, cmd, output_stem, return_code)
+
+    return run_test_step(
+        step=TestStep.SIMULATION, cmd=cmd, log_stem=output_stem, slots=slots, timeouts=timeouts, **kwargs
+    )
+
+def check_simulators_agree(
+    drivers: list[Path],
+    simulators: tuple[Simulator, Simulator],
+    output_dir: Path,
+    sample_size: int = SIMULATOR_CHECK_SAMPLE_SIZE
+) -> list[Path] | None:
+    """
+    Simulates the executables of a random sample of tests built from their reference,
+    with each of `simulators`, comparing their exit codes and outputs.
+    Outputs are put in `output_dir`.
+
+    Returns the drivers of the tests they disagree on, or None if the sample couldn't be built.
+    """
+    gcc_cmd = get_gcc_cmd()
+    disagreeing_drivers = []
+    for driver in random.sample(drivers, min(sample_size, len(drivers))):
+        output_stem = output_stem_from_test(output_dir, test_from_driver(driver))
+        remake_dir(output_stem.parent)
+        if generate_reference(test_from_driver(driver), output_stem, gcc_cmd) is not None or run_subprocess(
+            gcc_cmd + ["-static", append_suffix_to_stem(output_stem, "gcc.s"), driver, "-o", output_stem],
+            log_stem=append_suffix_to_stem(output_stem, TestStep.REFERENCE_LINKER.value),
+            log_limit=1 << 20
+        ) != 0:
+            return None
+
+        outcomes = []
+        for simulator in simulators:
+            log_stem = append_suffix_to_stem(output_stem, simulator.name.lower())
+            return_code = run_subprocess(
+                simulator.get_cmd(DEFAULT_ISA, output_stem),
+                log_stem=log_stem,
+                timeout=DEFAULT_STEP_TIMEOUTS[TestStep.SIMULATION],
+                log_limit=1 << 20
+            )
+            stdout_log, _ = get_logs_from_stem(log_stem)
+            outcomes.append((return_code, stdout_log.read_bytes() if stdout_log.is_file() else b""))
+        if outcomes[0] != outcomes[1]:
+            disagreeing_drivers.append(driver)
+    return disagreeing_drivers
+
 def test_from_driver(driver_file: Path) -> Path:
     """Removes the _driver part of driver file names (example_driver.c -> example.c)."""
     return driver_file.with_stem(driver_file.stem.removesuffix("_driver"))
@@ -279,17 +1203,98 @@ def test_from_driver(driver_file: Path) -> Path:
 def output_stem_from_test(output_dir: Path, test_file: Path) -> Path:
     return output_dir.joinpath(test_file.parent.name, test_file.stem, test_file.stem)
 
+def get_test_name(output_stem: Path) -> str:
+    """Names a test from its output stem, wherever it is (e.g. _example/example)."""
+    return f"{output_stem.parent.parent.name}/{output_stem.name}"
+
 type CompilerType = Callable[[Path, Path], TestError | None]
 
+def get_gcc_cmd(isa: str = DEFAULT_ISA, abi: str = DEFAULT_ABI) -> list[str]:
+    """Command of the RISC-V GCC used as reference, to assemble and to link, cached by ccache."""
+    return ["ccache", f"{RISCV_TOOLCHAIN_PREFIX}gcc", f"-march={isa}", f"-mabi={abi}"]
+
+def generate_reference(
+    test_file: Path,
+    output_stem: Path,
+    gcc_cmd: list[str],
+    cache_dir: Path | None = None,
+    **kwargs
+) -> TestError | None:
+    """
+    Generates the reference assembly of a test with GCC into `<output_stem>.gcc.s`.
+    If `cache_dir` is given, it is copied from there if it was already generated with the same
+    flags and toolchain, and stored there otherwise, as it doesn't depend on the student compiler.
+    Additional arguments are passed to `run_test_step`.
+
+    Returns None if successful, a TestError otherwise.
+    """
+    reference_file = append_suffix_to_stem(output_stem, "gcc.s")
+    cached_reference = None
+    if cache_dir is not None:
+        digest = hashlib.sha256()
+        digest.update(shlex.join(gcc_cmd).encode())
+        digest.update(get_toolchain_fingerprint().encode())
+        digest.update(hash_file(test_file).encode())
+        cached_reference = cache_dir / f"{test_file.stem}.{digest.hexdigest()[:16]}.s"
+        if cached_reference.is_file():
+            reference_file.write_bytes(cached_reference.read_bytes())
+            return None
+
+    if (error := run_test_step(
+        step=TestStep.REFERENCE,
+        cmd=gcc_cmd + [
+            "-std=c90", "-pedantic", "-ansi", "-O0",
+            "-S", test_file, # We went with this flag order, but gcc's -S doesn't take a value
+            "-o", reference_file
+        ],
+        log_stem=output_stem,
+        **kwargs
+    )) is not None or cached_reference is None:
+        return error
+
+    # Written next to the cached reference then moved, so that it is never partially written
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with NamedTemporaryFile(dir=cache_dir, suffix=".s", delete=False) as file:
+        file.write(reference_file.read_bytes())
+    Path(file.name).replace(cached_reference)
+    return None
+
 def run_test(
     compiler: CompilerType,
     output_dir: Path,
     driver_file: Path,
+    lazy_reference: bool = False,
+    driver_cache_dir: Path | None = None,
+    batcher: SimulationBatcher | None = None,
+    scratch_dir: Path | None = None,
+    keep_outputs: bool = False,
+    reference_timings: "ReferenceTimings | None" = None,
+    timeout_factor: float = 10.0,
+    compiler_build: Future | None = None,
+    isa: str = DEFAULT_ISA,
+    abi: str = DEFAULT_ABI,
+    reference_cache_dir: Path | None = None,
+    simulator: Simulator = Simulator.SPIKE,
     **kwargs
 ) -> TestError | None:
     """
-    Run an instance of a test case whose driver is given by `driver_file`.
+    Run an instance of a test case whose driver is given by `driver_file`,
+    for the architecture `isa` and the ABI `abi`, simulated with `simulator`.
     The output of all the steps are put in `output_dir`.
+    If `scratch_dir` is given, the steps are run in it instead, and their outputs are only moved
+    to `output_dir` if the test fails or `keep_outputs` is set.
+    If `lazy_reference` is set, the reference assembly is only generated when a step fails,
+    as it is only linked in error messages.
+    If `driver_cache_dir` is given, the driver is compiled once into it and reused across runs,
+    instead of being compiled when linking.
+    If `batcher` is given, the test is simulated in a batch with other tests (see
+    `SimulationBatcher`), which requires `driver_cache_dir` to link the driver object.
+    If `reference_timings` is given, the simulation is limited to `timeout_factor` times
+    the simulation time of the reference (see `adapt_simulation_timeout`).
+    If `compiler_build` is given, the steps from compiling onwards wait for the compiler to be built
+    (see `wait_compiler_build`), while the previous ones don't depend on it.
+    If `reference_cache_dir` is given, the reference assembly is generated once into it and
+    reused across runs (see `generate_reference`).
     Additional arguments are passed to `compiler` and `run_test_step`.
 
     Returns None if successful, otherwise the TestError of the failing step,
@@ -304,76 +1309,484 @@ def run_test(
 
     # Construct the stem to use for output files, so the path without the suffix
     # e.g. .../build/output/_example/example/example
-    output_stem = output_stem_from_test(output_dir, test_file)
+    output_stem = output_stem_from_test(scratch_dir or output_dir, test_file)
 
     # Recreate the directory
     remake_dir(output_stem.parent)
 
-    # GCC is not targetting rv32imfd (base target of the course) because:
-    # rv32imfd is compatible with rv32gc and the C extension is a part of extended goals
-    # _zicntr allows for cycles and instructions measurements with rdcycle and rdinstret
-    isa = "rv32gc_zicntr"
-    gcc_cmd = ["ccache", "riscv32-unknown-elf-gcc", f"-march={isa}", "-mabi=ilp32d"]
-
-    # GCC Reference Output
-    if (error := run_test_step(
-        step=TestStep.REFERENCE,
-        cmd=gcc_cmd + [
-            "-std=c90", "-pedantic", "-ansi", "-O0",
-            "-S", test_file, # We went with this flag order, but gcc's -S doesn't take a value
-            "-o", append_suffix_to_stem(output_stem, "gcc.s")
-        ],
-        log_stem=output_stem,
-        **kwargs
-    )) is not None:
-        return error
+    gcc_cmd = get_gcc_cmd(isa, abi)
 
-    # Compile
-    if (error := compiler(test_file, output_stem, **kwargs)) is not None:
-        return error
+    # Time limits of this test, as the step adapting the simulation one updates them for the others
+    kwargs["timeouts"] = dict(kwargs.get("timeouts") or {})
 
-    # Assemble
-    if (error := run_test_step(
-        step=TestStep.ASSEMBLER,
-        cmd=gcc_cmd + [
-            "-c", append_suffix_to_stem(output_stem, "s"), # -c doesn't take a value
-            "-o", append_suffix_to_stem(output_stem, "o")
-        ],
-        log_stem=output_stem,
+    # GCC Reference Output
+    reference = partial(
+        generate_reference,
+        test_file=test_file,
+        output_stem=output_stem,
+        gcc_cmd=gcc_cmd,
+        cache_dir=reference_cache_dir,
         **kwargs
-    )) is not None:
-        return error
+    )
 
-    # Link
-    if (error := run_test_step(
-        step=TestStep.LINKER,
-        cmd=gcc_cmd + [
-            "-static", # Finally not pretending -static takes a value (it doesn't)
-            append_suffix_to_stem(output_stem, "o"), driver_file,
-            "-o", output_stem
-        ],
-        log_stem=output_stem,
-        **kwargs
-    )) is not None:
-        return error
+    # Driver object, which doesn't depend on the student compiler so it can be cached
+    steps = []
+    driver_object = driver_file
+    assert batcher is None or driver_cache_dir is not None, "Batching requires driver objects"
+    if driver_cache_dir is not None:
+        driver_object = get_driver_object(driver_file, gcc_cmd, driver_cache_dir)
+        steps.append(partial(
+            compile_driver,
+            driver_file=driver_file,
+            driver_object=driver_object,
+            gcc_cmd=gcc_cmd,
+            log_stem=output_stem,
+            **kwargs
+        ))
 
-    # Simulate
-    if (error := run_test_step(
-        step=TestStep.SIMULATION,
-        cmd=["spike", f"--isa={isa}", "pk", output_stem],
-        log_stem=output_stem,
-        **kwargs
-    )) is not None:
-        return error
+    if reference_timings is not None:
+        steps.append(partial(
+            adapt_simulation_timeout,
+            driver_file=driver_file,
+            output_stem=output_stem,
+            driver_object=driver_object,
+            gcc_cmd=gcc_cmd,
+            isa=isa,
+            reference_timings=reference_timings,
+            factor=timeout_factor,
+            generate_reference=reference if lazy_reference else None,
+            simulator=simulator,
+            **kwargs
+        ))
 
-    if sanitizer_files := list(get_sanitizer_files_from_stem_parent(output_stem)):
-        return TestError(short_message="Sanitizer warnings", files=sanitizer_files)
+    if compiler_build is not None:
+        steps.append(partial(wait_compiler_build, compiler_build))
 
-    return None
+    steps += [
+        # Compile
+        partial(compiler, test_file, output_stem, **kwargs),
+        # Assemble
+        partial(
+            run_test_step,
+            step=TestStep.ASSEMBLER,
+            cmd=gcc_cmd + [
+                "-c", append_suffix_to_stem(output_stem, "s"), # -c doesn't take a value
+                "-o", append_suffix_to_stem(output_stem, "o")
+            ],
+            log_stem=output_stem,
+            **kwargs
+        ),
+        # Link
+        partial(
+            run_test_step,
+            step=TestStep.LINKER,
+            cmd=gcc_cmd + [
+                "-static", # Finally not pretending -static takes a value (it doesn't)
+                append_suffix_to_stem(output_stem, "o"), driver_object,
+                "-o", output_stem
+            ],
+            log_stem=output_stem,
+            **kwargs
+        ),
+        # Simulate
+        partial(
+            run_test_step,
+            step=TestStep.SIMULATION,
+            cmd=simulator.get_cmd(isa, output_stem),
+            log_stem=output_stem,
+            **kwargs
+        ) if batcher is None else partial(
+            simulate_batched_test,
+            output_stem=output_stem,
+            driver_object=driver_object,
+            gcc_cmd=gcc_cmd,
+            isa=isa,
+            batcher=batcher,
+            simulator=simulator,
+            **kwargs
+        ),
+    ]
+    if not lazy_reference:
+        steps.insert(0, reference)
 
-class JUnitXMLFile():
+    for step in steps:
+        if (error := step()) is not None:
+            # Batches shouldn't wait for a test that won't be simulated
+            if batcher is not None and step is not steps[-1]:
+                batcher.skip()
+            # An invalid test takes precedence, as with the reference generated first
+            if lazy_reference and (reference_error := reference()) is not None:
+                error = reference_error
+            break
+    else:
+        if sanitizer_files := list(get_sanitizer_files_from_stem_parent(output_stem)):
+            error = TestError(short_message="Sanitizer warnings", files=sanitizer_files)
+
+    if scratch_dir is not None:
+        return move_scratch_outputs(
+            output_stem, output_stem_from_test(output_dir, test_file), error, keep_outputs
+        )
+    return error
+
+def move_scratch_outputs(
+    scratch_stem: Path,
+    output_stem: Path,
+    error: TestError | None,
+    keep_outputs: bool = False
+) -> TestError | None:
+    """
+    Moves the outputs of a test from its scratch directory to its output directory,
+    only if it failed or `keep_outputs` is set, and discards them otherwise.
+    Outputs from previous runs are removed in any case.
+
+    Returns the error of the test, referring to the moved outputs.
+    """
+    rmtree(output_stem.parent, ignore_errors=True)
+    if error is None and not keep_outputs:
+        rmtree(scratch_stem.parent, ignore_errors=True)
+        return None
+
+    output_stem.parent.parent.mkdir(parents=True, exist_ok=True)
+    move(scratch_stem.parent, output_stem.parent)
+    return None if error is None else error.relocate(scratch_stem.parent, output_stem.parent)
+
+def read_json_file(path: Path) -> dict:
+    """Reads a JSON object from a file, or returns an empty one if missing or invalid."""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+def write_json_file(path: Path, data: dict):
+    """Writes a JSON object to a file, replacing it at once so it is never partially written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_suffix(".tmp")
+    temporary_path.write_text(json.dumps(data), encoding="utf-8")
+    temporary_path.replace(path)
+
+class ResultCache():
+    """
+    Persisted outcome of each test, keyed by a hash of everything that outcome depends on:
+    the test file, the driver and its dependencies (see `get_driver_dependencies`),
+    the compiler configuration and the toolchain.
+
+    Results are always recorded, but only reused when `reuse` is set.
+    A cached failure is only reused if the output directory still holds the files it links.
+    The fingerprint of the toolchain and compiler is only computed by `get_fingerprint`
+    when first needed, e.g. after the compiler is built.
+    """
+    def __init__(self, path: Path, configuration: str, get_fingerprint: Callable[[], str], reuse: bool = False):
+        self._path = path
+        self._configuration = configuration
+        self._get_fingerprint = get_fingerprint
+        self._fingerprint = None
+        self.reuse = reuse
+        self._results = {}
+        self._outputs = {}
+
+    def __enter__(self):
+        data = read_json_file(self._path)
+        self._results = data.get("results", {})
+        self._outputs = data.get("outputs", {})
+        return self
+
+    def digest(self, driver_file: Path) -> str:
+        """Hashes the inputs of a test, to be passed to `get` and `put`."""
+        if self._fingerprint is None:
+            self._fingerprint = self._get_fingerprint()
+        digest = hashlib.sha256()
+        for part in (self._fingerprint, self._configuration):
+            digest.update(part.encode())
+            digest.update(b"\0")
+        for file in chain([test_from_driver(driver_file)], get_driver_dependencies(driver_file)):
+            digest.update(hash_file(file).encode())
+        return digest.hexdigest()
+
+    def get(self, driver_file: Path, digest: str) -> TestError | None:
+        """
+        Returns the cached outcome of a test with the given digest.
+
+        Raises KeyError if there is no reusable outcome.
+        """
+        test = str(test_from_driver(driver_file))
+        entry = self._results.get(self._configuration, {}).get(test)
+        if not self.reuse or entry is None or entry["digest"] != digest:
+            raise KeyError(test)
+        if entry["error"] is None:
+            return None
+        error = TestError.from_json(entry["error"])
+        if self._outputs.get(test) != digest or not all(file.exists() for file in error.get_files()):
+            raise KeyError(test)
+        return error
+
+    def put(self, driver_file: Path, digest: str, error: TestError | None):
+        """Records the outcome of a test that has just been run."""
+        test = str(test_from_driver(driver_file))
+        self._results.setdefault(self._configuration, {})[test] = {
+            "digest": digest,
+            "error": None if error is None else error.to_json(),
+        }
+        self._outputs[test] = digest
+
+    def __exit__(self, *_):
+        write_json_file(self._path, {"results": self._results, "outputs": self._outputs})
+
+class TestHistory():
+    """
+    Persisted duration and outcome of the last run of each test,
+    used to schedule the tests expected to take the longest first,
+    so the run doesn't end waiting on a single slow test.
+    """
     def __init__(self, path: Path):
         self._path = path
+        self._tests = {}
+
+    def __enter__(self):
+        self._tests = read_json_file(self._path)
+        return self
+
+    def sort(self, drivers: list[Path], failed_first: bool = False) -> list[Path]:
+        """
+        Sorts drivers by decreasing duration of their last run, with tests never run first,
+        and optionally tests that failed in their last run before the others.
+        """
+        def key(driver: Path) -> tuple[bool, float]:
+            entry = self._tests.get(str(test_from_driver(driver)))
+            if entry is None:
+                return (False, -float("inf"))
+            return (failed_first and not entry["failed"], -entry["duration"])
+        return sorted(drivers, key=key)
+
+    def get_duration(self, driver_file: Path) -> float | None:
+        """Returns the duration of the last run of a test in seconds, if it was run."""
+        entry = self._tests.get(str(test_from_driver(driver_file)))
+        return None if entry is None else entry["duration"]
+
+    def has_failed(self, driver_file: Path) -> bool:
+        """Returns whether a test failed in its last run."""
+        entry = self._tests.get(str(test_from_driver(driver_file)))
+        return entry is not None and entry["failed"]
+
+    def record(self, driver_file: Path, error: TestError | None, duration: float):
+        self._tests[str(test_from_driver(driver_file))] = {
+            "duration": duration,
+            "failed": error is not None,
+        }
+
+    def __exit__(self, *_):
+        write_json_file(self._path, self._tests)
+
+class ReferenceTimings():
+    """
+    Persisted simulation time of the reference of each test, keyed by a hash of the test file,
+    the driver and its dependencies (see `get_driver_dependencies`) and the toolchain.
+    """
+    def __init__(self, path: Path, fingerprint: str):
+        self._path = path
+        self._fingerprint = fingerprint
+        self._tests = {}
+
+    def __enter__(self):
+        self._tests = read_json_file(self._path)
+        return self
+
+    def _digest(self, driver_file: Path) -> str:
+        digest = hashlib.sha256(self._fingerprint.encode())
+        for file in chain([test_from_driver(driver_file)], get_driver_dependencies(driver_file)):
+            digest.update(hash_file(file).encode())
+        return digest.hexdigest()
+
+    def get(self, driver_file: Path) -> float | None:
+        """Returns the simulation time of the reference of a test in seconds, if known."""
+        entry = self._tests.get(str(test_from_driver(driver_file)))
+        if entry is None or entry["digest"] != self._digest(driver_file):
+            return None
+        return entry["time"]
+
+    def put(self, driver_file: Path, time: float):
+        self._tests[str(test_from_driver(driver_file))] = {
+            "digest": self._digest(driver_file),
+            "time": time,
+        }
+
+    def __exit__(self, *_):
+        write_json_file(self._path, self._tests)
+
+class GccReferences():
+    """
+    Persisted simulated instructions and binary size of each benchmark compiled by GCC
+    at each of `GCC_REFERENCE_LEVELS`, keyed by a hash of the test, the driver and its dependencies
+    (see `get_driver_dependencies`) and the toolchain.
+    """
+    def __init__(self, path: Path, fingerprint: str):
+        self._path = path
+        self._fingerprint = fingerprint
+        self._tests = {}
+
+    def __enter__(self):
+        self._tests = read_json_file(self._path)
+        return self
+
+    def _digest(self, driver_file: Path) -> str:
+        digest = hashlib.sha256(self._fingerprint.encode())
+        for file in chain([test_from_driver(driver_file)], get_driver_dependencies(driver_file)):
+            digest.update(hash_file(file).encode())
+        return digest.hexdigest()
+
+    def get(self, driver_file: Path, level: str) -> dict | None:
+        """Returns the metrics of a benchmark compiled by GCC with `level`, if known."""
+        entry = self._tests.get(str(test_from_driver(driver_file)))
+        if entry is None or entry["digest"] != self._digest(driver_file):
+            return None
+        return entry["levels"].get(level)
+
+    def put(self, driver_file: Path, level: str, metrics: dict):
+        test = str(test_from_driver(driver_file))
+        digest = self._digest(driver_file)
+        if (entry := self._tests.get(test)) is None or entry["digest"] != digest:
+            entry = self._tests[test] = {"digest": digest, "levels": {}}
+        entry["levels"][level] = metrics
+
+    def __exit__(self, *_):
+        write_json_file(self._path, self._tests)
+
+def get_gcov_functions(
+    data_files: list[Path],
+    executed_only: bool = False
+) -> dict[str, tuple[str, int, int]] | None:
+    """
+    Reads the functions of coverage data files with gcov: `.gcda` files, with the `.gcno` file
+    of the same name next to them, or `.gcno` files alone for functions without their counters.
+    Optionally only keeps the functions executed.
+
+    Returns the source file and line range of each function by `<source file>:<mangled name>`,
+    or None if gcov failed.
+    """
+    try:
+        result = subprocess.run(
+            ["gcov", "--json-format", "--stdout"] + data_files,
+            capture_output=True, text=True, check=False
+        )
+    except FileNotFoundError:
+        return None
+    if result.returncode != 0:
+        return None
+
+    functions = {}
+    # One JSON document per line, one per data file
+    for line in result.stdout.splitlines():
+        if not line.startswith("{"):
+            continue
+        data = json.loads(line)
+        for source in data["files"]:
+            source_path = Path(data["current_working_directory"], source["file"])
+            for function in source["functions"]:
+                if not executed_only or function["execution_count"] > 0:
+                    functions[f"{source_path}:{function['name']}"] = (
+                        str(source_path), function["start_line"], function["end_line"]
+                    )
+    return functions
+
+def read_test_coverage(gcov_dir: Path, object_root: Path) -> dict[str, tuple[str, int, int]] | None:
+    """
+    Reads the functions executed from the counters of the compiler written into `gcov_dir`
+    instead of next to its objects, relative to `object_root` (see `GCOV_PREFIX_STRIP`).
+    Functions of external files, like the standard library, are excluded.
+
+    Returns them as `get_gcov_functions` does, or None if there are no counters.
+    """
+    if not (data_files := list(gcov_dir.rglob("*.gcda"))):
+        return None
+    for data_file in data_files:
+        data_file.with_suffix(".gcno").symlink_to(
+            object_root / data_file.relative_to(gcov_dir).with_suffix(".gcno")
+        )
+    if (functions := get_gcov_functions(data_files, executed_only=True)) is None:
+        return None
+    return {
+        function: location for function, location in functions.items()
+        if Path(location[0]).is_relative_to(object_root)
+    }
+
+class TestCoverage():
+    """
+    Persisted functions of the compiler executed by each test when it was last compiled,
+    with a hash of their source, keyed by a hash of the test and driver files and the toolchain,
+    to only run the tests affected by changes (see `get_affected`).
+    """
+    def __init__(self, path: Path, fingerprint: str):
+        self._path = path
+        self._fingerprint = fingerprint
+        self._tests = {}
+        self._sources = {}
+
+    def __enter__(self):
+        self._tests = read_json_file(self._path)
+        self._sources = {}
+        return self
+
+    def _digest(self, test_file: Path) -> str:
+        digest = hashlib.sha256(self._fingerprint.encode())
+        for file in (test_file, test_file.with_stem(f"{test_file.stem}_driver")):
+            digest.update(hash_file(file).encode())
+        return digest.hexdigest()
+
+    def _hash_function(self, source: str, start_line: int, end_line: int) -> str | None:
+        if source not in self._sources:
+            try:
+                self._sources[source] = Path(source).read_bytes().splitlines()
+            except FileNotFoundError:
+                self._sources[source] = None
+        if (lines := self._sources[source]) is None:
+            return None
+        return hashlib.sha256(b"\n".join(lines[start_line - 1:end_line])).hexdigest()
+
+    def record(self, test_file: Path, functions: dict[str, tuple[str, int, int]] | None):
+        """
+        Stores the functions a test executed (see `get_gcov_functions`), or forgets the test if
+        they are unknown, so it is always affected.
+        """
+        if functions is None:
+            self._tests.pop(str(test_file), None)
+            return
+        self._tests[str(test_file)] = {
+            "digest": self._digest(test_file),
+            "functions": {
+                function: self._hash_function(*location)
+                for function, location in functions.items()
+            },
+        }
+
+    def get_affected(self, drivers: list[Path], functions: dict[str, tuple[str, int, int]]) -> list[Path]:
+        """
+        Selects the tests affected by changes since they were recorded, given the `functions` of
+        the compiler as currently built: the tests never recorded, whose test or driver changed,
+        or which executed a function whose source changed or that doesn't exist any more.
+        """
+        hashes = {}
+        def has_changed(function: str, recorded_hash: str) -> bool:
+            if function not in hashes:
+                hashes[function] = self._hash_function(*functions[function]) if function in functions else None
+            return hashes[function] != recorded_hash
+
+        affected = []
+        for driver in drivers:
+            test_file = test_from_driver(driver)
+            entry = self._tests.get(str(test_file))
+            if entry is None or entry["digest"] != self._digest(test_file) or any(
+                has_changed(function, recorded_hash) for function, recorded_hash in entry["functions"].items()
+            ):
+                affected.append(driver)
+        return affected
+
+    def __exit__(self, *_):
+        write_json_file(self._path, self._tests)
+
+class JUnitXMLFile():
+    def __init__(self, path: Path, content_limit: int | None = None):
+        self._path = path
+        self._content_limit = content_limit
         self._fd = None
 
     def __enter__(self):
@@ -385,17 +1798,18 @@ class JUnitXMLFile():
     def _write(self, msg: str):
         self._fd.write(msg)
 
-    def _write_testcase(self, test_file: Path, body: str = ""):
+    def _write_testcase(self, test_file: Path, body: str = "", time: float | None = None):
+        time_attribute = "" if time is None else f" time={xml.quoteattr(f'{time:.3f}')}"
         self._write(
-            f"<testcase name={xml.quoteattr(str(test_file))}>\n"
+            f"<testcase name={xml.quoteattr(str(test_file))}{time_attribute}>\n"
             f"{body}</testcase>\n"
         )
 
-    def write_result(self, test_file: Path, error: TestError | None = None):
-        self._write_testcase(test_file, "" if error is None else \
+    def write_result(self, test_file: Path, error: TestError | None = None, time: float | None = None):
+        self._write_testcase(test_file, time=time, body="" if error is None else \
             f"<error type={xml.quoteattr('error')} "
             f"message={xml.quoteattr(error.get_short_message())}>\n"
-            f"{xml.escape(error.get_message_with_file_content())}</error>\n"
+            f"{xml.escape(error.get_message_with_file_content(self._content_limit))}</error>\n"
         )
 
     def __exit__(self, *_):
@@ -408,17 +1822,49 @@ def run_tests(
     output_dir: Path,
     report_path: str | None = None,
     status: str = "Running tests",
+    cache: ResultCache | None = None,
+    batch_size: int = 0,
+    step_jobs: dict[TestStep, int] | None = None,
+    history: TestHistory | None = None,
+    failed_first: bool = False,
+    fail_fast: int = 0,
+    profile: StepProfile | None = None,
+    scratch_dir: Path | None = None,
+    log_limit: int | None = None,
+    reference_timings: ReferenceTimings | None = None,
+    compiler_build: Future | None = None,
+    configurations: dict[str, dict] | None = None,
     **kwargs
 ) -> tuple[int, int]:
     """
     Runs tests in `tests_dir` against the compiler provided by `compiler`.
     Puts outputs inside `output_dir`.
     Arguments `compiler` and `output_dir` are mandatory and are passed to `run_test`.
+    If `cache` is given, tests whose outcome is cached are not run, and new outcomes are stored.
+    If `batch_size` is above 1, tests are simulated in batches of up to that size.
+    At most `jobs` steps run at the same time, and fewer for the steps in `step_jobs`.
+    If `history` is given, tests expected to take the longest run first, optionally after
+    the tests that failed last time if `failed_first` is set, and their durations are stored.
+    If `fail_fast` is positive, tests not started yet are skipped after that many failures.
+    If `profile` is given, the resources used by each step are recorded in it.
+    If `scratch_dir` is given, tests run in a temporary directory inside it (see `run_test`).
+    If `log_limit` is given, the output of steps and the content of files in the report
+    are limited to about that many bytes each.
+    If `reference_timings` is given, the simulation time limits are adapted to each test
+    (see `run_test`), and the simulation times of references are stored in it.
+    If `compiler_build` is given, the steps of all tests that don't depend on the compiler run while
+    it is being built (see `run_test`).
+    If `configurations` is given, each test runs once in each configuration, with the arguments
+    of `run_test` given by its name, in a single pass, and the results of each are printed;
+    outcomes are then neither cached nor stored in `history`, which only orders the tests.
     Additional arguments are passed to `compiler` and `run_test_step`.
 
-    Returns a tuple of (passing, total) tests.
+    Returns a tuple of (passing, total) tests, over all configurations if given.
     """
-    passed = failed = 0
+    passed = failed = cached = skipped = 0
+    assert configurations is None or cache is None, "Outcomes are cached per configuration"
+    # Passing and total tests of each configuration
+    configuration_results = {configuration: [0, 0] for configuration in configurations or {}}
 
     with ExitStack() as stack:
         progress = stack.enter_context(Progress(
@@ -436,150 +1882,1642 @@ def run_tests(
             disable=not stdout.isatty(),
         ))
         xml_file = stack.enter_context(
-            JUnitXMLFile(output_dir / report_path) if report_path is not None else nullcontext()
+            JUnitXMLFile(output_dir / report_path, content_limit=log_limit)
+            if report_path is not None else nullcontext()
+        )
+        if cache is not None:
+            stack.enter_context(cache)
+        if history is not None:
+            stack.enter_context(history)
+        if profile is not None:
+            kwargs["profile"] = stack.enter_context(profile)
+        if reference_timings is not None:
+            kwargs["reference_timings"] = stack.enter_context(reference_timings)
+        if log_limit is not None:
+            kwargs["log_limit"] = log_limit
+        if scratch_dir is not None:
+            kwargs["scratch_dir"] = Path(stack.enter_context(
+                TemporaryDirectory(dir=scratch_dir, prefix="langproc_")
+            ))
+
+        task_id = progress.add_task(
+            status, total=len(drivers) * len(configurations or [None]), passed=0, failed=0, rate=0.0
         )
-        executor = stack.enter_context(ThreadPoolExecutor(max_workers=jobs))
 
-        task_id = progress.add_task(status, total=len(drivers), passed=0, failed=0, rate=0.0)
+        def get_test_kwargs(configuration: str | None) -> dict:
+            """Arguments of `run_test` for the tests of a configuration, if any."""
+            test_kwargs = {"output_dir": output_dir} | kwargs | (configurations or {}).get(configuration, {})
+            # Outputs of the same test in different configurations would collide in a shared scratch directory
+            if configuration is not None and test_kwargs.get("scratch_dir") is not None:
+                test_kwargs["scratch_dir"] = test_kwargs["scratch_dir"] / str(list(configurations).index(configuration))
+            return test_kwargs
+
+        def record_result(driver: Path, error: TestError | None, configuration: str | None = None):
+            nonlocal passed, failed
+            test_file = get_relative_path_str(test_from_driver(driver))
+            if configuration is not None:
+                test_file = f"{configuration}/{test_file}"
+                configuration_results[configuration][0] += error is None
+                configuration_results[configuration][1] += 1
+
+            if error is not None:
+                failed += 1
+                reporter.info(
+                    rich_escape(f"{test_file}: {error.get_message_with_file_list()}"),
+                    style="red"
+                )
+            else:
+                passed += 1
+
+            elapsed = progress.tasks[task_id].elapsed or 0.0
+            progress.update(
+                task_id,
+                advance=1,
+                passed=passed,
+                failed=failed,
+                rate=(passed + failed) / elapsed if elapsed > 0 else 0.0,
+            )
+
+            if xml_file is not None:
+                time = None
+                if profile is not None:
+                    # Steps are recorded under the output stem `run_test` used for the test
+                    test_kwargs = get_test_kwargs(configuration)
+                    time = profile.pop_test_time(output_stem_from_test(
+                        test_kwargs.get("scratch_dir") or test_kwargs["output_dir"], test_from_driver(driver)
+                    ))
+                xml_file.write_result(test_file=test_file, error=error, time=time)
+
+        drivers_to_run = []
+        driver_to_digest = {}
+        for driver in drivers:
+            # Digests depend on the compiler, so only wait for it to be built to reuse results
+            if cache is not None and cache.reuse:
+                driver_to_digest[driver] = cache.digest(driver)
+                try:
+                    error = cache.get(driver, driver_to_digest[driver])
+                except KeyError:
+                    pass
+                else:
+                    cached += 1
+                    record_result(driver, error)
+                    continue
+            drivers_to_run.append(driver)
+        if history is not None:
+            drivers_to_run = history.sort(drivers_to_run, failed_first=failed_first)
+        # Configurations run one after the other rather than the same test in all of them at once,
+        # so that what they share is ready by the time the next ones need it
+        instances_to_run = [
+            (driver, configuration)
+            for configuration in configurations or [None]
+            for driver in drivers_to_run
+        ]
+
+        # Jobs limit the steps running at the same time rather than the tests,
+        # so that there are always tests ready to start a step when another one finishes
+        kwargs["slots"] = StepSlots(jobs, step_jobs)
+        workers = 2 * jobs
+        if batch_size > 1:
+            # Tests waiting for their batch to fill up take a thread but not a slot
+            kwargs["batcher"] = SimulationBatcher(
+                batch_size, expected_tests=len(instances_to_run), profile=profile, log_limit=log_limit
+            )
+            workers = max(workers, jobs * batch_size)
+        if compiler_build is not None:
+            kwargs["compiler_build"] = compiler_build
+            if not compiler_build.done():
+                # Tests waiting for the compiler to be built take a thread but not a slot
+                workers = max(workers, len(instances_to_run))
+        executor = stack.enter_context(ThreadPoolExecutor(max_workers=workers))
+
+        # Only submit tests a bit ahead of the workers rather than all of them upfront
+        instances_to_submit = iter(instances_to_run)
+        job_to_instance = {}
+
+        def run_timed_test(**kwargs) -> tuple[TestError | None, float]:
+            start_time = perf_counter()
+            error = run_test(**kwargs)
+            return error, perf_counter() - start_time
+
+        def submit_tests(count: int):
+            for driver, configuration in islice(instances_to_submit, count):
+                job = executor.submit(
+                    run_timed_test,
+                    driver_file=driver,
+                    **get_test_kwargs(configuration)
+                )
+                job_to_instance[job] = driver, configuration
+
+        def skip_remaining_tests():
+            nonlocal skipped
+            remaining_tests = list(instances_to_submit)
+            remaining_tests.extend(job_to_instance[job] for job in job_to_instance if job.cancel())
+            skipped += len(remaining_tests)
+            if (batcher := kwargs.get("batcher")) is not None:
+                batcher.skip(len(remaining_tests))
+
+        try:
+            submit_tests(2 * workers)
+            if fail_fast and failed >= fail_fast:
+                skip_remaining_tests()
+            while job_to_instance:
+                done_jobs, _ = wait(job_to_instance, return_when=FIRST_COMPLETED)
+                for job in done_jobs:
+                    driver, configuration = job_to_instance.pop(job)
+                    if job.cancelled():
+                        continue
+                    error, duration = job.result()
+                    if cache is not None:
+                        cache.put(driver, driver_to_digest.get(driver) or cache.digest(driver), error)
+                    if history is not None and configuration is None:
+                        history.record(driver, error, duration)
+                    record_result(driver, error, configuration)
+                    if fail_fast and error is not None and failed == fail_fast:
+                        skip_remaining_tests()
+                submit_tests(len(done_jobs))
+        except BaseException:
+            # Don't wait for running tests to go through their remaining steps (e.g. on Ctrl+C)
+            executor.shutdown(wait=False, cancel_futures=True)
+            process_groups.cancel()
+            raise
+
+    assert len(drivers) * len(configurations or [None]) == passed + failed + skipped, \
+        "Mismatch in number of tests with status " \
+        f"({passed} passed, {failed} failed, {skipped} skipped, {len(drivers)} found)"
+
+    if cached:
+        reporter.info(f"Reused {cached} cached test results")
+    if skipped:
+        reporter.warning(f"Skipped {skipped} tests after {fail_fast} failures")
+    if configuration_results:
+        reporter.error("[bold]Results per configuration:[/]", style="purple")
+    for configuration, (configuration_passed, configuration_total) in configuration_results.items():
+        reporter.error(
+            rich_escape(f"\t{configuration}: passed {configuration_passed}/{configuration_total}"),
+            style="green" if configuration_passed == configuration_total else "red"
+        )
+
+    return passed, passed + failed
+
+class SampleStatistics():
+    """
+    Median, median absolute deviation (MAD) and 95% confidence interval of the median
+    of a non-empty list of samples, which makes no assumption on their distribution.
+    """
+    def __init__(self, samples: list[float]):
+        sorted_samples = sorted(samples)
+        self.count = len(sorted_samples)
+        self.median = median(sorted_samples)
+        self.mad = median(abs(sample - self.median) for sample in sorted_samples)
+        # Order statistics around the median, from the normal approximation
+        # of the binomial distribution of the number of samples below it
+        offset = 1.96 * sqrt(self.count) / 2
+        self.ci_low = sorted_samples[max(0, floor(self.count / 2 - offset) - 1)]
+        self.ci_high = sorted_samples[min(self.count - 1, ceil(self.count / 2 + offset))]
+
+    def get_relative_error(self) -> float:
+        """Half-width of the confidence interval relative to the median."""
+        if self.median <= 0:
+            return float("inf")
+        return (self.ci_high - self.ci_low) / 2 / self.median
+
+    def __str__(self) -> str:
+        return (
+            f"{self.median * 1000:.2f} ms (MAD {self.mad * 1000:.2f} ms, "
+            f"95% CI {self.ci_low * 1000:.2f}-{self.ci_high * 1000:.2f} ms, {self.count} samples)"
+        )
+
+def get_core_siblings(cpu: int) -> set[int]:
+    """Hardware threads (e.g. hyperthreads) of the physical core of a CPU, itself included."""
+    try:
+        siblings_list = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list").read_text()
+    except OSError:
+        return {cpu}
+    siblings = set()
+    for siblings_range in siblings_list.strip().split(","):
+        first, _, last = siblings_range.partition("-")
+        siblings.update(range(int(first), int(last or first) + 1))
+    return siblings
+
+class BenchmarkCores():
+    """
+    CPUs reserved for benchmarks, so that they can run in parallel without disturbing each other:
+    each benchmark uses a reserved CPU on its own, and everything else runs on the other CPUs.
+    Up to `count` CPUs are reserved, on distinct physical cores, leaving one core for everything else.
+    If `idle_siblings` is set, the other hardware threads of the reserved cores are left idle.
+    """
+    def __init__(self, count: int, idle_siblings: bool = False):
+        available_cpus = sched_getaffinity(0)
+        cores = []
+        for cpu in sorted(available_cpus):
+            if not any(cpu in core for core in cores):
+                cores.append(get_core_siblings(cpu) & available_cpus | {cpu})
+
+        reserved_cores = cores[:max(1, min(count, len(cores) - 1))]
+        self.reserved_cpus = [min(core) for core in reserved_cores]
+        idle_cpus = set().union(*reserved_cores) if idle_siblings else set(self.reserved_cpus)
+        # Everything shares the CPUs with benchmarks if there is a single core
+        self.other_cpus = (available_cpus - idle_cpus) or available_cpus
+        self._free_cpus = list(reversed(self.reserved_cpus))
+        self._condition = Condition()
+
+    @contextmanager
+    def isolate(self):
+        """Runs the calling thread, and the threads and processes it starts, on the CPUs not reserved."""
+        affinity = sched_getaffinity(0)
+        sched_setaffinity(0, self.other_cpus)
+        try:
+            yield
+        finally:
+            sched_setaffinity(0, affinity)
+
+    @contextmanager
+    def reserve(self) -> Iterator[int]:
+        """
+        Waits for a reserved CPU to be free, and runs the calling thread
+        and the processes it starts on it.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._free_cpus)
+            cpu = self._free_cpus.pop()
+        affinity = sched_getaffinity(0)
+        sched_setaffinity(0, {cpu})
+        try:
+            yield cpu
+        finally:
+            sched_setaffinity(0, affinity)
+            with self._condition:
+                self._free_cpus.append(cpu)
+                self._condition.notify()
+
+def is_noisy_sample(usage: ProcessUsage) -> bool:
+    """
+    Whether a benchmark sample took noticeably longer than its CPU time, which means
+    it waited for the CPU (or for IO), likely disturbed by another process.
+    """
+    return usage.wall_time > NOISY_SAMPLE_RATIO * (usage.user_time + usage.system_time)
+
+def get_quiet_samples(samples: list[dict]) -> list[dict]:
+    """Benchmark samples that aren't noisy (see `is_noisy_sample`), or all of them if all are."""
+    return [sample for sample in samples if not sample.get("noisy")] or samples
+
+def benchmark_compilation(
+    cmd: list[str | Path],
+    output_stem: Path,
+    max_samples: int,
+    precision: float,
+    cores: BenchmarkCores | None = None,
+    slots: StepSlots | None = None,
+    timeouts: dict[TestStep, float] | None = None,
+    log_limit: int | None = None,
+    env: dict[str, str] | None = None,
+    **_kwargs
+) -> TestError | None:
+    """
+    Measures the wall and CPU times of a compilation command run directly again and again,
+    once one of the `slots` for compilation is available if given, and on one of the reserved
+    `cores` if given. The first `BENCHMARK_WARMUP_RUNS` runs are discarded, then up to
+    `max_samples` samples are taken, until the 95% confidence interval of the median wall time
+    of samples that aren't noisy is within `precision` of it (relative, with at least
+    `BENCHMARK_MIN_SAMPLES`). The samples are stored in `<output_stem>.compilation_time.json`,
+    with the CPU they ran on and whether they are noisy (see `is_noisy_sample`).
+
+    Returns None if successful, a TestError otherwise.
+    """
+    timeout = None if timeouts is None else timeouts.get(TestStep.COMPILER)
+    samples = []
+    with (
+        slots(TestStep.COMPILER) if slots is not None else nullcontext(),
+        cores.reserve() if cores is not None else nullcontext() as cpu
+    ):
+        for run in range(BENCHMARK_WARMUP_RUNS + max_samples):
+            return_code, usage = run_measured_subprocess(
+                cmd,
+                log_stem=append_suffix_to_stem(output_stem, TestStep.COMPILER.value),
+                timeout=timeout,
+                log_limit=log_limit,
+                env=env
+            )
+            if return_code != 0:
+                return get_test_step_error(TestStep.COMPILER, cmd, output_stem, return_code, timeout)
+            if run < BENCHMARK_WARMUP_RUNS:
+                continue
+            samples.append(usage.to_json() | {"cpu": cpu, "noisy": is_noisy_sample(usage)})
+            quiet_samples = get_quiet_samples(samples)
+            if len(quiet_samples) >= BENCHMARK_MIN_SAMPLES and SampleStatistics(
+                [sample["wall_time"] for sample in quiet_samples]
+            ).get_relative_error() <= precision:
+                break
+
+    write_json_file(append_suffix_to_stem(output_stem, "compilation_time.json"), {
+        "warmup_runs": BENCHMARK_WARMUP_RUNS,
+        "samples": samples,
+    })
+    return None
+
+def student_compiler(
+    compiler_path: Path,
+    repetitions: int = 0,
+    opt_flag: str | None = None,
+    precision: float = 0.01,
+    cores: BenchmarkCores | None = None,
+    test_coverage: TestCoverage | None = None,
+    profile_dir: Path | None = None
+) -> CompilerType:
+    """
+    Wrapper for `build/c_compiler [opt_flag...] -S <input_file> -o <log_stem>.s`,
+    benchmarked with at most `repetitions` runs to the given `precision` on the reserved `cores`
+    if positive (see `benchmark_compilation`). If `test_coverage` is given, the coverage counters
+    of each compilation are written into `<log_stem>.gcov/` and the functions executed are
+    recorded in it. If `profile_dir` is given, the compiler must be built for gprof
+    (see `MakeRule.PROFILE_BUILD`), and the profile and CPU time of each compilation are written
+    into `<profile_dir>/<test directory>/<test>.gmon.<pid>` and `<test>.json` (see `report_compiler_profile`).
+    Additional arguments are passed to `run_test_step`.
+
+    Returns None if successful, a TestError otherwise.
+    """
+    # Directory the compiler objects were built from, so gcda files are relative to it
+    object_root = Path(compiler_path).resolve().parent.parent
+
+    def compiler(input_file: Path, output_stem: Path, **kwargs) -> TestError | None:
+        env = environ.copy()
+
+        cmd = [compiler_path, "-S", input_file, "-o", append_suffix_to_stem(output_stem, "s")]
+        if opt_flag is not None:
+            cmd[1:1] = shlex.split(opt_flag)
+
+        # Modifying environment to store sanitizer errors
+        env["ASAN_OPTIONS"] = f"log_path={output_stem}.asan.log"
+        env["UBSAN_OPTIONS"] = f"log_path={output_stem}.ubsan.log"
+
+        # Counters of each test on their own rather than summed up next to the compiler objects
+        gcov_dir = append_suffix_to_stem(output_stem, "gcov")
+        if test_coverage is not None:
+            env["GCOV_PREFIX"] = str(gcov_dir)
+            env["GCOV_PREFIX_STRIP"] = str(len(object_root.parts) - 1)
+
+        # Profiles of each test on their own rather than overwriting gmon.out in the working directory
+        profile_stem = None
+        if profile_dir is not None:
+            profile_stem = profile_dir.joinpath(output_stem.parent.parent.name, output_stem.name)
+            profile_stem.parent.mkdir(parents=True, exist_ok=True)
+            env["GMON_OUT_PREFIX"] = str(append_suffix_to_stem(profile_stem, "gmon"))
+
+        error, usage = run_measured_test_step(
+            step=TestStep.COMPILER, cmd=cmd, log_stem=output_stem, env=env, **kwargs
+        )
+        if profile_stem is not None and usage is not None:
+            write_json_file(
+                append_suffix_to_stem(profile_stem, "json"), {"cpu_time": usage.user_time + usage.system_time}
+            )
+        if test_coverage is not None:
+            test_coverage.record(input_file, read_test_coverage(gcov_dir, object_root) if error is None else None)
+        if error is not None or repetitions == 0:
+            return error
+        return benchmark_compilation(
+            cmd, output_stem, max_samples=repetitions, precision=precision, cores=cores, env=env, **kwargs
+        )
+
+    return compiler
+
+def report_compiler_profile(compiler_path: Path, profile_dir: Path, top_functions: int = 15) -> bool:
+    """
+    Merges the gprof profiles of the compilations of each test written by `student_compiler`
+    into `<profile_dir>/gmon.sum`, writes its flat profile and call graph into
+    `<profile_dir>/flat_profile.txt` and `<profile_dir>/call_graph.txt`, then prints the
+    `top_functions` functions taking the most time and the tests whose compilation CPU time
+    is an outlier (see `COMPILER_TIME_OUTLIER_MADS`).
+
+    Returns True if successful, False otherwise.
+    """
+    gmon_files = sorted(profile_dir.rglob("*.gmon.*"))
+    if not gmon_files:
+        reporter.error(f"No compiler profile was written into {get_relative_path_str(profile_dir)}")
+        return False
+    try:
+        if subprocess.run(
+            ["gprof", "-s", compiler_path] + gmon_files,
+            capture_output=True, cwd=profile_dir, check=False
+        ).returncode != 0:
+            reporter.error("Merging the compiler profiles with gprof failed")
+            return False
+        reports = {
+            file_name: subprocess.run(
+                ["gprof", "-b", flag, compiler_path, profile_dir / "gmon.sum"],
+                capture_output=True, text=True, check=True
+            ).stdout
+            for file_name, flag in (("flat_profile.txt", "-p"), ("call_graph.txt", "-q"))
+        }
+    except (FileNotFoundError, subprocess.CalledProcessError) as e:
+        reporter.error(f"Reading the compiler profile with gprof failed: {e}")
+        return False
+    for file_name, report in reports.items():
+        (profile_dir / file_name).write_text(report, encoding="utf-8")
+
+    reporter.error(
+        f"\tFunctions taking the most time over {len(gmon_files)} compilations "
+        f"(see {get_relative_path_str(profile_dir)}/flat_profile.txt and call_graph.txt):",
+        style="purple"
+    )
+    # Rows of the flat profile: % time, cumulative seconds, self seconds, [calls, self/call, total/call,] name
+    rows = re.findall(
+        r"^\s*(\d+\.\d+)\s+\d+\.\d+\s+(\d+\.\d+)\s+(?:\d+\s+\d+\.\d+\s+\d+\.\d+\s+)?(.+)$",
+        reports["flat_profile.txt"],
+        flags=re.MULTILINE
+    )
+    for percent, self_time, name in rows[:top_functions]:
+        reporter.error(rich_escape(f"\t\t{percent}% ({self_time} s) {name}"), style="purple")
+
+    cpu_times = {
+        json_file.relative_to(profile_dir).with_suffix("").as_posix(): cpu_time
+        for json_file in profile_dir.rglob("*.json")
+        if (cpu_time := read_json_file(json_file).get("cpu_time")) is not None
+    }
+    if not cpu_times:
+        return True
+    statistics = SampleStatistics(list(cpu_times.values()))
+    threshold = statistics.median + COMPILER_TIME_OUTLIER_MADS * statistics.mad
+    outliers = sorted(
+        ((cpu_time, test) for test, cpu_time in cpu_times.items() if cpu_time > threshold), reverse=True
+    )
+    reporter.error(
+        f"\t{len(outliers)} tests compiled in over {threshold * 1000:.2f} ms of CPU time "
+        f"(median {statistics.median * 1000:.2f} ms, MAD {statistics.mad * 1000:.2f} ms)"
+        + (":" if outliers else ""),
+        style="purple"
+    )
+    for cpu_time, test in outliers:
+        reporter.error(
+            f"\t\t{test}: {cpu_time * 1000:.2f} ms ({cpu_time / (statistics.median or 1):.1f}x median)",
+            style="red"
+        )
+    return True
+
+class CompilerBuildError(Exception):
+    """The compiler failed to build, so no test can run."""
+
+def wait_compiler_build(compiler_build: Future) -> None:
+    """
+    Waits for the compiler being built by `compiler_build`, which returns whether it succeeded.
+
+    Raises CompilerBuildError if it failed.
+    """
+    if not compiler_build.result():
+        raise CompilerBuildError()
+
+def symlink_reference_compiler(_input_file: Path, output_stem: Path, **_kwargs) -> TestError | None:
+    """
+    Symlinks the result of riscv-gcc as its own result and move its logs as our own.
+    It isn't really a compiler but can be passed as a compiler function to use the result of
+    riscv-gcc as the output of the compiler, thus testing the ability of riscv-gcc to pass tests.
+
+    Returns None; never fails.
+    """
+    reference_stem = append_suffix_to_stem(output_stem, TestStep.REFERENCE.value)
+    compiler_stem = append_suffix_to_stem(output_stem, TestStep.COMPILER.value)
+    for suffix in ["stdout.log", "stderr.log"]:
+        # Logs of successful steps are only written if not empty
+        if (reference_log := append_suffix_to_stem(reference_stem, suffix)).is_file():
+            move(reference_log, append_suffix_to_stem(compiler_stem, suffix))
+    # Relative, so that it still works if the outputs are moved
+    append_suffix_to_stem(output_stem, "s").symlink_to(append_suffix_to_stem(output_stem, "gcc.s").name)
+    return None
+
+def remake_dir(dir: Path):
+    rmtree(dir, ignore_errors=True)
+    dir.mkdir(parents=True, exist_ok=True)
+
+def get_drivers_from_path(dir: Path, exclude_dir: Path | None = None) -> list[Path]:
+    return [driver for driver in dir.rglob("*_driver.c")
+            if exclude_dir is None or not driver.is_relative_to(exclude_dir)]
+
+def sample_sanitizer_reruns(
+    drivers: list[Path],
+    history: TestHistory,
+    sample_size: int
+) -> tuple[list[Path], list[Path]]:
+    """
+    Selects the tests to rerun with sanitizers after running them with an optimised compiler.
+
+    Returns a tuple of (failing tests, random sample of `sample_size` passing tests).
+    """
+    failing = [driver for driver in drivers if history.has_failed(driver)]
+    passing = [driver for driver in drivers if not history.has_failed(driver)]
+    return failing, random.sample(passing, min(sample_size, len(passing)))
+
+def select_shard(
+    drivers: list[Path],
+    index: int,
+    count: int,
+    history: TestHistory | None = None
+) -> list[Path]:
+    """
+    Selects the tests of shard `index` (from 1) out of `count` shards, such that every test is in
+    exactly one shard as long as all shards get the same tests and history.
+    Tests are assigned from the longest to run to the shard with the least total duration,
+    using the durations of their last run in `history` if given (the median one if never run).
+    """
+    drivers = sorted(drivers)
+    durations = {
+        driver: None if history is None else history.get_duration(driver)
+        for driver in drivers
+    }
+    known_durations = [duration for duration in durations.values() if duration is not None]
+    default_duration = median(known_durations) if known_durations else 1.0
+    for driver, duration in durations.items():
+        if duration is None:
+            durations[driver] = default_duration
+
+    shard_durations = [0.0] * count
+    shard_drivers = []
+    # Sorting is stable, so tests with the same duration stay sorted by path
+    for driver in sorted(drivers, key=lambda driver: -durations[driver]):
+        shard = min(range(count), key=lambda shard: shard_durations[shard])
+        shard_durations[shard] += durations[driver]
+        if shard == index - 1:
+            shard_drivers.append(driver)
+    return shard_drivers
+
+def merge_junit_reports(reports: list[Path], output_path: Path) -> tuple[set[str], set[str]]:
+    """
+    Merges the test cases of JUnit reports (see `JUnitXMLFile`) into a single report.
+
+    Returns a tuple of (passing, all) test names.
+    """
+    testcases = {}
+    for report in reports:
+        for testcase in ElementTree.parse(report).iter("testcase"):
+            if (name := testcase.get("name")) in testcases:
+                reporter.warning(f"Test {name} is in several reports, keeping the result in {report}")
+            testcases[name] = testcase
+
+    testsuite = ElementTree.Element("testsuite", name="Compiler benchmark")
+    testsuite.extend(testcases[name] for name in sorted(testcases))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    ElementTree.ElementTree(testsuite).write(output_path, encoding="UTF-8", xml_declaration=True)
+
+    return (
+        {name for name, testcase in testcases.items() if testcase.find("error") is None},
+        set(testcases)
+    )
+
+def merge_coverage(info_files: list[Path], coverage_dir: Path, log_stem: Path) -> bool:
+    """
+    Merges lcov coverage data into `<coverage_dir>/lcov.info` and generates
+    its webpage, like `make coverage` does for a single run.
+
+    Returns True if successful, False otherwise.
+    """
+    coverage_dir.mkdir(parents=True, exist_ok=True)
+    merged_info = coverage_dir / "lcov.info"
+    try:
+        return run_subprocess(
+            ["lcov"] + list(chain.from_iterable(("-a", info_file) for info_file in info_files)) + ["-o", merged_info],
+            log_stem=append_suffix_to_stem(log_stem, "lcov"),
+            log_limit=1 << 20
+        ) == 0 and run_subprocess(
+            ["genhtml", "--flat", "--ignore-errors", "unmapped", "-o", coverage_dir, merged_info],
+            log_stem=append_suffix_to_stem(log_stem, "genhtml"),
+            log_limit=1 << 20
+        ) == 0
+    except FileNotFoundError:
+        return False
+
+class ElfSection():
+    """Header of a section of an ELF file."""
+    def __init__(self, name: str, type: int, flags: int, offset: int, size: int, link: int, entsize: int):
+        self.name = name
+        self.type = type
+        self.flags = flags
+        self.offset = offset
+        self.size = size
+        self.link = link
+        self.entsize = entsize
+
+class ElfSymbol():
+    """Entry of the symbol table of an ELF file."""
+    def __init__(self, name: str, value: int, size: int, type: int, section_index: int):
+        self.name = name
+        self.value = value
+        self.size = size
+        self.type = type
+        self.section_index = section_index
+
+class ElfFile():
+    """
+    Reader of the section headers and symbol table of an ELF file (32 or 64-bit, of any endianness),
+    mapped in memory rather than spawning the binutils.
+
+    Raises ValueError if the file isn't a valid ELF file.
+    """
+    SHT_SYMTAB = 2
+    SHT_NOBITS = 8
+    SHF_ALLOC = 0x2
+    STT_NOTYPE = 0
+    STT_OBJECT = 1
+    STT_FUNC = 2
+    SHN_UNDEF = 0
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._data = None
+        self.sections = []
+
+    def __enter__(self):
+        with self._path.open("rb") as file:
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._read_sections()
+        except (ValueError, IndexError, struct.error) as e:
+            self._data.close()
+            raise ValueError(f"Invalid ELF file {self._path}") from e
+        return self
+
+    def _read_sections(self):
+        if self._data[:4] != b"\x7fELF" or self._data[4] not in (1, 2) or self._data[5] not in (1, 2):
+            raise ValueError("Invalid ELF header")
+        self._is_64_bit = self._data[4] == 2
+        self._byte_order = "<" if self._data[5] == 1 else ">"
+
+        if self._is_64_bit:
+            section_headers_offset, = self._unpack("Q", 0x28)
+            header_size, header_count, names_index = self._unpack("HHH", 0x3A)
+            header_format = "IIQQQQIIQQ"
+        else:
+            section_headers_offset, = self._unpack("I", 0x20)
+            header_size, header_count, names_index = self._unpack("HHH", 0x2E)
+            header_format = "IIIIIIIIII"
+
+        headers = [
+            self._unpack(header_format, section_headers_offset + index * header_size)
+            for index in range(header_count)
+        ]
+        names_offset = headers[names_index][4] if headers else 0
+        self.sections = [
+            ElfSection(
+                name=self._read_string(names_offset + name),
+                type=type, flags=flags, offset=offset, size=size, link=link, entsize=entsize
+            )
+            for name, type, flags, _, offset, size, link, _, _, entsize in headers
+        ]
+
+    def _unpack(self, format: str, offset: int) -> tuple:
+        return struct.unpack_from(self._byte_order + format, self._data, offset)
+
+    def _read_string(self, offset: int) -> str:
+        end = self._data.find(b"\0", offset)
+        if end < 0:
+            raise ValueError("Unterminated string")
+        return self._data[offset:end].decode(errors="replace")
+
+    def get_section_sizes(self) -> dict[str, int]:
+        """Sizes of the sections loaded in memory (.text, .data, .bss...) by name, in bytes."""
+        sizes = {}
+        for section in self.sections:
+            if section.flags & self.SHF_ALLOC:
+                sizes[section.name] = sizes.get(section.name, 0) + section.size
+        return sizes
+
+    def get_binary_size(self) -> int:
+        """Size of the content of the sections loaded in memory, excluding those zero-initialised (.bss)."""
+        return sum(
+            section.size for section in self.sections
+            if section.flags & self.SHF_ALLOC and section.type != self.SHT_NOBITS
+        )
+
+    def get_symbols(self) -> Iterator[ElfSymbol]:
+        """Symbols defined in the file (with a section)."""
+        symbol_format = "IBBHQQ" if self._is_64_bit else "IIIBBH"
+        for table in self.sections:
+            if table.type != self.SHT_SYMTAB or table.entsize == 0:
+                continue
+            names_offset = self.sections[table.link].offset
+            for offset in range(table.offset, table.offset + table.size, table.entsize):
+                if self._is_64_bit:
+                    name, info, _, section_index, value, size = self._unpack(symbol_format, offset)
+                else:
+                    name, value, size, info, _, section_index = self._unpack(symbol_format, offset)
+                if section_index != self.SHN_UNDEF:
+                    yield ElfSymbol(self._read_string(names_offset + name), value, size, info & 0xF, section_index)
+
+    def get_symbol_sizes(self) -> dict[str, int]:
+        """Sizes of the functions and objects defined in the file by name, in bytes."""
+        return {
+            symbol.name: symbol.size
+            for symbol in self.get_symbols()
+            if symbol.type in (self.STT_OBJECT, self.STT_FUNC)
+        }
+
+    def __exit__(self, *_):
+        self._data.close()
+
+def read_elf_sizes(path: Path) -> tuple[int, dict[str, int], dict[str, int]] | None:
+    """
+    Returns a tuple of (binary size, section sizes, symbol sizes) of an ELF file (see `ElfFile`),
+    or None if it is missing or invalid.
+    """
+    try:
+        with ElfFile(path) as elf_file:
+            return elf_file.get_binary_size(), elf_file.get_section_sizes(), elf_file.get_symbol_sizes()
+    except (FileNotFoundError, ValueError):
+        return None
+
+def assemble_references(output_stems: list[Path], gcc_cmd: list[str], log_stem: Path):
+    """
+    Assembles the reference assembly of tests into `<output_stem>.gcc.o` in a single GCC call,
+    which names objects after their sources in its working directory (test names must be unique).
+    """
+    references = [
+        reference for output_stem in output_stems
+        if (reference := append_suffix_to_stem(output_stem, "gcc.s")).is_file()
+    ]
+    if not references:
+        return
+    # Next to the outputs, as objects can't be moved from a temporary directory on another filesystem
+    with TemporaryDirectory(prefix="references_", dir=log_stem.parent) as objects_dir:
+        if run_subprocess(
+            cmd=gcc_cmd + ["-c"] + references,
+            log_stem=log_stem,
+            log_limit=1 << 20,
+            cwd=objects_dir
+        ) != 0:
+            return
+        for reference in references:
+            (Path(objects_dir) / reference.with_suffix(".o").name).replace(reference.with_suffix(".o"))
+
+class ExecutionProfile():
+    """
+    Instructions executed by each function and each basic block of an executable,
+    counted from a spike instruction log (see `profile_executable`).
+
+    Basic blocks are found from the log: one starts wherever the execution didn't continue
+    with the next instruction at least once, and where it continued after such an instruction.
+    They are named after the closest label before them, which requires local labels like `.L2`
+    to be kept in the executable (`as -L`), with the line of the label in `assembly_file`.
+    Instructions outside the functions of the executable (i.e. in pk) are ignored.
+    """
+    # e.g. "core   0: 0x000101b0 (0x00000513) li      a0, 0"
+    LOG_PATTERN = re.compile(rb"core\s+\d+:\s+(?:\d\s+)?0x([0-9a-fA-F]+)\s+\(0x([0-9a-fA-F]+)\)")
+
+    def __init__(self, executable: Path, instruction_log: Path, assembly_file: Path):
+        with ElfFile(executable) as elf_file:
+            symbols = [
+                symbol for symbol in elf_file.get_symbols()
+                if symbol.type in (ElfFile.STT_FUNC, ElfFile.STT_NOTYPE) and symbol.name
+                    # Special sections (e.g. absolute symbols) have indices above the sections
+                    and symbol.section_index < len(elf_file.sections)
+                    and elf_file.sections[symbol.section_index].flags & ElfFile.SHF_ALLOC
+            ]
+        functions = sorted(
+            (symbol.value, symbol.value + symbol.size, symbol.name)
+            for symbol in symbols if symbol.type == ElfFile.STT_FUNC and symbol.size > 0
+        )
+        label_lines = {}
+        if assembly_file.is_file():
+            for number, line in enumerate(assembly_file.read_text(errors="replace").splitlines(), start=1):
+                label, colon, _ = line.strip().partition(":")
+                if colon and label:
+                    label_lines.setdefault(label, number)
+        # Labels of the assembly file, and functions rather than labels at the same address
+        labels = sorted((
+            {symbol.value: symbol.name for symbol in symbols if symbol.name in label_lines}
+            | {start: name for start, _, name in functions}
+        ).items())
+
+        counts, block_starts = self._read_log(instruction_log)
+
+        self.functions = {}
+        self.blocks = {}
+        function_starts = [start for start, _, _ in functions]
+        label_addresses = [address for address, _ in labels]
+        block = block_function = None
+        for pc in sorted(counts):
+            index = bisect_right(function_starts, pc) - 1
+            if index < 0 or pc >= functions[index][1]:
+                block = None
+                continue
+            function = functions[index][2]
+            self.functions[function] = self.functions.get(function, 0) + counts[pc]
+            if block is None or pc in block_starts or function != block_function:
+                block_function = function
+                label_address, label = labels[bisect_right(label_addresses, pc) - 1]
+                if label_address < functions[index][0]:
+                    label_address, label = functions[index][0], function
+                block = function if label == function else f"{function} {label}"
+                if pc != label_address:
+                    block += f"+{pc - label_address:#x}"
+                if label in label_lines:
+                    block += f" ({assembly_file.name}:{label_lines[label]})"
+                self.blocks[block] = [counts[pc], 0]
+            self.blocks[block][1] += counts[pc]
+
+    @classmethod
+    def _read_log(cls, instruction_log: Path) -> tuple[dict[int, int], set[int]]:
+        counts = {}
+        block_starts = set()
+        next_pc = None
+        with instruction_log.open("rb") as log:
+            for line in log:
+                if (match := cls.LOG_PATTERN.match(line)) is None:
+                    continue
+                pc = int(match[1], 16)
+                counts[pc] = counts.get(pc, 0) + 1
+                if pc != next_pc:
+                    block_starts.add(pc)
+                    if next_pc is not None:
+                        block_starts.add(next_pc)
+                # Compressed instructions don't have their two lowest bits set
+                next_pc = pc + (4 if int(match[2], 16) & 0b11 == 0b11 else 2)
+        return counts, block_starts
+
+    def to_json(self) -> dict:
+        return {
+            "functions": self.functions,
+            "blocks": {block: {"executions": executions, "instructions": instructions}
+                       for block, (executions, instructions) in self.blocks.items()},
+        }
+
+def profile_executable(
+    executable: Path,
+    assembly_file: Path,
+    isa: str,
+    log_stem: Path
+) -> ExecutionProfile | None:
+    """
+    Simulates an executable logging every instruction, and counts the instructions
+    executed by its functions and basic blocks (see `ExecutionProfile`).
+    The log is deleted once read, as it can be large.
+
+    Returns the profile, or None if the simulation fails.
+    """
+    instruction_log = append_suffix_to_stem(log_stem, "instructions.log")
+    try:
+        if run_subprocess(
+            ["spike", "-l", f"--log={instruction_log}", f"--isa={isa}", "pk", executable],
+            log_stem=append_suffix_to_stem(log_stem, TestStep.SIMULATION.value),
+            log_limit=1 << 20
+        ) != 0 or not instruction_log.is_file():
+            return None
+        return ExecutionProfile(executable, instruction_log, assembly_file)
+    finally:
+        instruction_log.unlink(missing_ok=True)
+
+def profile_benchmark(
+    output_stem: Path,
+    driver_file: Path,
+    isa: str = DEFAULT_ISA,
+    abi: str = DEFAULT_ABI
+) -> dict[str, ExecutionProfile | None]:
+    """
+    Profiles the executables of a benchmark built from the assembly of the student compiler
+    and of GCC, keeping local labels so that basic blocks can be named after them.
+
+    Returns the profile of each, by compiler.
+    """
+    profiles = {}
+    for compiler, suffix in ((TestStep.COMPILER.value, "s"), ("gcc", "gcc.s")):
+        assembly_file = append_suffix_to_stem(output_stem, suffix)
+        profile_stem = append_suffix_to_stem(output_stem, f"{compiler}.profile")
+        profiles[compiler] = None
+        if assembly_file.is_file() and run_subprocess(
+            get_gcc_cmd(isa, abi) + ["-Wa,-L", "-static", assembly_file, driver_file, "-o", profile_stem],
+            log_stem=append_suffix_to_stem(profile_stem, TestStep.LINKER.value),
+            log_limit=1 << 20
+        ) == 0:
+            profiles[compiler] = profile_executable(profile_stem, assembly_file, isa, profile_stem)
+            if (profile := profiles[compiler]) is not None:
+                write_json_file(append_suffix_to_stem(profile_stem, "json"), profile.to_json())
+    return profiles
+
+def report_benchmark_profiles(output_dir: Path, drivers: list[Path], hottest_blocks: int = 5):
+    """
+    Prints the instructions executed by each function of each benchmark (with the student compiler
+    and GCC), and its hottest basic blocks. In spike, each instruction takes one cycle
+    (rdcycle is rdinstret).
+    """
+    for driver in drivers:
+        output_stem = output_stem_from_test(output_dir, test_from_driver(driver))
+        profiles = profile_benchmark(output_stem, driver)
+        profile, gcc_profile = profiles[TestStep.COMPILER.value], profiles["gcc"]
+        if profile is None:
+            reporter.warning(f"Could not profile {output_stem.name}")
+            continue
+
+        reporter.error(f"\t{output_stem.name} profile:", style="purple")
+        # Functions of the test first, then those of the driver and the C library
+        _, _, test_symbols = read_elf_sizes(output_stem.with_suffix(".o")) or (None, {}, {})
+        gcc_functions = gcc_profile.functions if gcc_profile is not None else {}
+        for function in sorted(
+            profile.functions.keys() | gcc_functions.keys(),
+            key=lambda function: (function not in test_symbols, -profile.functions.get(function, 0))
+        ):
+            reporter.info(rich_escape(
+                f"\t\tfunction {function}: {profile.functions.get(function, 'N/A')} instructions "
+                f"(GCC {gcc_functions.get(function, 'N/A')})"
+            ), style="purple")
+        for name, blocks_profile in (("", profile), ("GCC ", gcc_profile)):
+            if blocks_profile is None:
+                continue
+            for block, (executions, instructions) in sorted(
+                blocks_profile.blocks.items(), key=lambda item: -item[1][1]
+            )[:hottest_blocks]:
+                reporter.info(rich_escape(
+                    f"\t\t{name}block {block}: {instructions} instructions in {executions} executions"
+                ), style="purple")
+
+def read_simulated_instructions(stdout_log: Path) -> int | None:
+    """Reads the instructions counted with rdinstret by a benchmark driver from its output, if any."""
+    try:
+        return int(stdout_log.read_text(encoding="utf-8").strip())
+    except (ValueError, FileNotFoundError):
+        return None
+
+def measure_gcc_reference(
+    output_stem: Path,
+    driver_file: Path,
+    level: str,
+    isa: str = DEFAULT_ISA,
+    abi: str = DEFAULT_ABI
+) -> dict | None:
+    """
+    Compiles a benchmark with GCC at optimisation `level` into `<output_stem>.gcc_<level>.o`,
+    links it with its driver and simulates it, like the reference steps of `run_test`.
+
+    Returns its simulated instructions and binary size, or None if a step failed.
+    """
+    test_file = test_from_driver(driver_file)
+    level_stem = append_suffix_to_stem(output_stem, f"gcc_{level.lstrip('-')}")
+    gcc_cmd = get_gcc_cmd(isa, abi)
+    for step, cmd in (
+        (TestStep.REFERENCE, gcc_cmd + [
+            "-std=c90", "-pedantic", "-ansi", level,
+            "-c", test_file, "-o", append_suffix_to_stem(level_stem, "o")
+        ]),
+        (TestStep.REFERENCE_LINKER, gcc_cmd + [
+            "-static", append_suffix_to_stem(level_stem, "o"), driver_file, "-o", level_stem
+        ]),
+        (TestStep.REFERENCE_SIMULATION, ["spike", f"--isa={isa}", "pk", level_stem]),
+    ):
+        if run_subprocess(
+            cmd,
+            log_stem=append_suffix_to_stem(level_stem, step.value),
+            timeout=DEFAULT_STEP_TIMEOUTS[step],
+            log_limit=1 << 20
+        ) != 0:
+            return None
+
+    binary_size = (read_elf_sizes(append_suffix_to_stem(level_stem, "o")) or (None,))[0]
+    return {
+        "simulated_instructions": read_simulated_instructions(
+            append_suffix_to_stem(level_stem, f"{TestStep.REFERENCE_SIMULATION.value}.stdout.log")
+        ),
+        "binary_size": binary_size,
+    }
+
+def get_geometric_mean(values: list[float]) -> float | None:
+    """Returns the geometric mean of positive values, or None if there are none."""
+    if not values:
+        return None
+    return 2 ** (sum(log2(value) for value in values) / len(values))
+
+def format_ratio(ratio: float | None) -> str:
+    return f"{ratio:.2f}" if ratio is not None else "N/A"
+
+def get_ratio(value: int | None, reference: int | None) -> float | None:
+    """Returns value / reference, or None if either is unknown or the reference is 0."""
+    return value / reference if value is not None and reference else None
+
+def benchmark(
+    output_dir: Path,
+    drivers: list[Path],
+    gcc_references: GccReferences | None = None
+) -> dict[str, dict]:
+    """
+    Prints the metrics of each benchmark from their outputs, with the sizes of the
+    objects compared with the GCC reference.
+    With `gcc_references`, the simulated instructions and binary size are also compared with
+    GCC at each of `GCC_REFERENCE_LEVELS`, measured once per benchmark and toolchain,
+    followed by the geometric mean of each ratio over the benchmarks.
+
+    Returns the metrics of each benchmark by test name (see `get_test_name`).
+    """
+    output_stems = [
+        output_stem_from_test(output_dir, test_from_driver(driver))
+        for driver in drivers
+    ]
+    assemble_references(output_stems, get_gcc_cmd(), log_stem=output_dir / "benchmark_references")
+
+    results = {}
+    level_ratios = {
+        level: {"simulated_instructions": [], "binary_size": []}
+        for level in GCC_REFERENCE_LEVELS
+    }
+    for driver, output_stem in zip(drivers, output_stems):
+
+        # Compilation time obtained from the samples of the time spent compiling the test case
+        samples = read_json_file(append_suffix_to_stem(output_stem, "compilation_time.json")).get("samples")
+        compilation_time = cpu_time = None
+        noisy_samples = 0
+        if samples:
+            quiet_samples = get_quiet_samples(samples)
+            noisy_samples = len(samples) - len(quiet_samples)
+            compilation_time = SampleStatistics([sample["wall_time"] for sample in quiet_samples])
+            cpu_time = SampleStatistics([sample["user_time"] + sample["system_time"] for sample in quiet_samples])
+
+        # Simulated instructions using ASM rdinstret in driver code
+        simulated_instructions = read_simulated_instructions(
+            append_suffix_to_stem(output_stem, "simulation.stdout.log")
+        )
+
+        # Binary size obtained as the sum of the sections of the object file loaded in memory
+        # with content (.text, .data, .rodata, .sdata...), compared with GCC
+        binary_size, section_sizes, symbol_sizes = read_elf_sizes(output_stem.with_suffix(".o")) \
+            or (None, {}, {})
+        gcc_binary_size, gcc_section_sizes, gcc_symbol_sizes = read_elf_sizes(
+            append_suffix_to_stem(output_stem, "gcc.o")
+        ) or (None, {}, {})
+
+        reporter.error(
+            f"\t{output_stem.name}: "
+            f"compilation time = {compilation_time or 'N/A'}, "
+            f"compilation CPU time = {f'{cpu_time.median * 1000:.2f} ms' if cpu_time else 'N/A'}, "
+            + (f"{noisy_samples} noisy samples discarded, " if noisy_samples else "") +
+            f"simulated instructions = {simulated_instructions or 'N/A'}, "
+            f"binary size = {binary_size or 'N/A'} B (GCC {gcc_binary_size or 'N/A'} B)",
+            style="purple"
+        )
+        for kind, sizes, gcc_sizes in (
+            ("section", section_sizes, gcc_section_sizes),
+            ("symbol", symbol_sizes, gcc_symbol_sizes),
+        ):
+            for name in sorted(sizes.keys() | gcc_sizes.keys()):
+                reporter.info(rich_escape(
+                    f"\t\t{kind} {name}: {sizes.get(name, 'N/A')} B (GCC {gcc_sizes.get(name, 'N/A')} B)"
+                ), style="purple")
+
+        gcc_ratios = {}
+        if gcc_references is not None:
+            for level in GCC_REFERENCE_LEVELS:
+                if (reference := gcc_references.get(driver, level)) is None:
+                    if (reference := measure_gcc_reference(output_stem, driver, level)) is None:
+                        reporter.warning(f"Measuring {output_stem.name} with GCC {level} failed")
+                        continue
+                    gcc_references.put(driver, level, reference)
+                gcc_ratios[level] = {
+                    "simulated_instructions": get_ratio(simulated_instructions, reference["simulated_instructions"]),
+                    "binary_size": get_ratio(binary_size, reference["binary_size"]),
+                }
+                for metric, ratio in gcc_ratios[level].items():
+                    if ratio:
+                        level_ratios[level][metric].append(ratio)
+            reporter.error(
+                "\t\tratios to GCC: " + ", ".join(
+                    f"{level} instructions x{format_ratio(ratios['simulated_instructions'])} "
+                    f"size x{format_ratio(ratios['binary_size'])}"
+                    for level, ratios in gcc_ratios.items()
+                ),
+                style="purple"
+            )
+
+        results[get_test_name(output_stem)] = {
+            "compilation_time": compilation_time.median if compilation_time else None,
+            "compilation_time_ci": [compilation_time.ci_low, compilation_time.ci_high]
+                if compilation_time else None,
+            "compilation_cpu_time": cpu_time.median if cpu_time else None,
+            "simulated_instructions": simulated_instructions,
+            "binary_size": binary_size,
+            "gcc_binary_size": gcc_binary_size,
+            "section_sizes": section_sizes,
+            "symbol_sizes": symbol_sizes,
+            "gcc_ratios": gcc_ratios,
+        }
+
+    if gcc_references is not None:
+        # The geometric mean weighs a benchmark twice as slow as one twice as fast
+        reporter.error(
+            "\tGeometric mean of the ratios to GCC: " + ", ".join(
+                f"{level} instructions x{format_ratio(get_geometric_mean(ratios['simulated_instructions']))} "
+                f"size x{format_ratio(get_geometric_mean(ratios['binary_size']))}"
+                for level, ratios in level_ratios.items()
+            ),
+            style="purple"
+        )
+
+    return results
+
+def generate_scaling_benchmarks(
+    templates_dir: Path,
+    generated_dir: Path,
+    sizes: tuple[int, ...] = SCALING_BENCHMARK_SIZES
+) -> list[Path]:
+    """
+    Instantiates each kernel of `templates_dir` for each of `sizes` into `<generated_dir>/<kernel>/`:
+    the kernel `<kernel>.c` (taking its size as an argument) is copied to `<kernel>_<N>.c`,
+    and its driver `<kernel>_driver.c` (using the size `N`) is included by `<kernel>_<N>_driver.c`
+    after defining `N`. Files are only rewritten if their content changes.
+
+    Returns the drivers generated.
+    """
+    drivers = []
+    for template_driver in sorted(get_drivers_from_path(templates_dir)):
+        kernel = test_from_driver(template_driver)
+        for size in sizes:
+            test_file = generated_dir / kernel.stem / f"{kernel.stem}_{size}.c"
+            driver = test_file.with_stem(f"{test_file.stem}_driver")
+            for file, content in (
+                (test_file, kernel.read_text(encoding="utf-8")),
+                (driver, f'#define N {size}\n#include "{template_driver.resolve()}"\n'),
+            ):
+                if not file.is_file() or file.read_text(encoding="utf-8") != content:
+                    file.parent.mkdir(parents=True, exist_ok=True)
+                    file.write_text(content, encoding="utf-8")
+            drivers.append(driver)
+    return drivers
+
+def count_reference_instructions(
+    output_stem: Path,
+    driver_file: Path,
+    isa: str = DEFAULT_ISA,
+    abi: str = DEFAULT_ABI
+) -> int | None:
+    """
+    Links the reference assembly of a benchmark with its driver into `<output_stem>.gcc`
+    and simulates it.
+
+    Returns the instructions counted by the driver, or None if it failed.
+    """
+    reference_executable = append_suffix_to_stem(output_stem, "gcc")
+    log_stem = append_suffix_to_stem(output_stem, TestStep.REFERENCE_SIMULATION.value)
+    if not append_suffix_to_stem(output_stem, "gcc.s").is_file() or run_subprocess(
+        get_gcc_cmd(isa, abi) + [
+            "-static", append_suffix_to_stem(output_stem, "gcc.s"), driver_file, "-o", reference_executable
+        ],
+        log_stem=append_suffix_to_stem(output_stem, TestStep.REFERENCE_LINKER.value),
+        log_limit=1 << 20
+    ) != 0 or run_subprocess(
+        ["spike", f"--isa={isa}", "pk", reference_executable],
+        log_stem=log_stem,
+        timeout=DEFAULT_STEP_TIMEOUTS[TestStep.SIMULATION],
+        log_limit=1 << 20
+    ) != 0:
+        return None
+    return read_simulated_instructions(append_suffix_to_stem(log_stem, "stdout.log"))
+
+def fit_growth_exponent(sizes: list[int], values: list[int]) -> float | None:
+    """
+    Fits `value = a * size^k` to the points given, with least squares on their logarithms.
+
+    Returns the exponent k, or None without at least 2 distinct sizes.
+    """
+    if len(set(sizes)) < 2:
+        return None
+    xs = [log2(size) for size in sizes]
+    ys = [log2(max(value, 1)) for value in values]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+
+def report_scaling_benchmarks(output_dir: Path, drivers: list[Path], history: TestHistory) -> int:
+    """
+    Prints how the instructions simulated by each scaling benchmark kernel grow with its size
+    (see `generate_scaling_benchmarks`) compared with GCC, from the outputs of the sizes that passed
+    according to `history`. Kernels growing faster than with GCC by more than
+    `SCALING_EXPONENT_TOLERANCE` are flagged.
+
+    Returns the number of kernels flagged.
+    """
+    kernels = {}
+    for driver in drivers:
+        test_file = test_from_driver(driver)
+        kernel, _, size = test_file.stem.rpartition("_")
+        output_stem = output_stem_from_test(output_dir, test_file)
+        instructions = None if history.has_failed(driver) else read_simulated_instructions(
+            append_suffix_to_stem(output_stem, "simulation.stdout.log")
+        )
+        kernels.setdefault(kernel, []).append(
+            (int(size), instructions, count_reference_instructions(output_stem, driver))
+        )
+
+    flagged = 0
+    for kernel, points in sorted(kernels.items()):
+        points.sort()
+        exponents = [
+            fit_growth_exponent(*zip(*[(size, point[index]) for size, *point in points if point[index] is not None]))
+            if any(point[index] is not None for _, *point in points) else None
+            for index in (0, 1)
+        ]
+        exponent, gcc_exponent = exponents
+        blowup = exponent is not None and gcc_exponent is not None \
+            and exponent > gcc_exponent + SCALING_EXPONENT_TOLERANCE
+        flagged += blowup
+        reporter.error(
+            f"\t{kernel}: simulated instructions grow as "
+            f"N^{f'{exponent:.2f}' if exponent is not None else 'N/A'} "
+            f"(GCC N^{f'{gcc_exponent:.2f}' if gcc_exponent is not None else 'N/A'})"
+            + (", faster than with GCC" if blowup else ""),
+            style="red" if blowup else "purple"
+        )
+        for size, instructions, gcc_instructions in points:
+            reporter.info(
+                f"\t\tN = {size}: {instructions if instructions is not None else 'N/A'} instructions "
+                f"(GCC {gcc_instructions if gcc_instructions is not None else 'N/A'})",
+                style="purple"
+            )
+    return flagged
+
+def get_compiler_revision(root_dir: Path) -> str | None:
+    """Git revision of the compiler sources, marked dirty if they have uncommitted changes."""
+    result = subprocess.run(
+        ["git", "-C", root_dir, "describe", "--always", "--dirty"],
+        capture_output=True, text=True, check=False
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+class BenchmarkHistory():
+    """
+    Results of all benchmark runs, appended as JSON lines to a file, one line per benchmark:
+    run (start time of test.py), compiler revision, optimisation flag, test and metrics.
+    """
+    def __init__(self, path: Path, revision: str | None):
+        self._path = path
+        self._revision = revision
+        self.run = datetime.now().isoformat(timespec="seconds")
+
+    def _read(self, path: Path | None = None) -> Iterator[dict]:
+        try:
+            with (path or self._path).open(encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def record(self, opt_flag: str | None, results: dict[str, dict]):
+        """Stores the results of this run with `opt_flag`."""
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._path.open("a", encoding="utf-8") as file:
+            for test, metrics in results.items():
+                file.write(json.dumps({
+                    "run": self.run,
+                    "revision": self._revision,
+                    "opt_flag": opt_flag,
+                    "test": test,
+                    "metrics": metrics,
+                }) + "\n")
 
-        job_to_driver = {
-            executor.submit(run_test, driver_file=driver, output_dir=output_dir, **kwargs): driver
-            for driver in drivers
-        }
+    def record_latest_runs(self, paths: list[Path]) -> int:
+        """
+        Stores the results of the latest run in each of other benchmark histories (e.g. of shards)
+        as results of this run.
 
-        for job in as_completed(job_to_driver):
-            test_file = get_relative_path_str(test_from_driver(job_to_driver[job]))
+        Returns the number of results stored.
+        """
+        recorded = 0
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._path.open("a", encoding="utf-8") as file:
+            for path in paths:
+                entries = list(self._read(path))
+                latest_run = max((entry["run"] for entry in entries), default=None)
+                for entry in entries:
+                    if entry["run"] == latest_run:
+                        file.write(json.dumps(entry | {"run": self.run}) + "\n")
+                        recorded += 1
+        return recorded
 
-            if (error := job.result()) is not None:
-                failed += 1
-                reporter.info(
-                    rich_escape(f"{test_file}: {error.get_message_with_file_list()}"),
-                    style="red"
-                )
-            else:
-                passed += 1
+    def find_run(self, baseline: str) -> str | None:
+        """
+        Finds the latest previous run matching `baseline`, which is either "previous",
+        the exact start time of a run, or the prefix of a compiler revision.
+        """
+        runs = {
+            entry["run"]: entry["revision"] or ""
+            for entry in self._read()
+            if entry["run"] != self.run
+        }
+        for run, revision in sorted(runs.items(), reverse=True):
+            if baseline in ("previous", run) or revision.startswith(baseline):
+                return run
+        return None
 
-            elapsed = progress.tasks[task_id].elapsed or 0.0
-            progress.update(
-                task_id,
-                advance=1,
-                passed=passed,
-                failed=failed,
-                rate=(passed + failed) / elapsed if elapsed > 0 else 0.0,
-            )
+    def get_results(self, run: str) -> dict[tuple[str | None, str], dict]:
+        """Returns the metrics of each benchmark of a run by optimisation flag and test."""
+        return {
+            (entry["opt_flag"], entry["test"]): entry["metrics"]
+            for entry in self._read()
+            if entry["run"] == run
+        }
 
-            if xml_file is not None:
-                xml_file.write_result(test_file=test_file, error=error)
+def compare_benchmarks(
+    baseline: dict[tuple[str | None, str], dict],
+    current: dict[tuple[str | None, str], dict],
+    thresholds: dict[str, float]
+) -> list[tuple[str, bool]]:
+    """
+    Compares the metrics of each benchmark of the baseline with the current ones (see
+    `BenchmarkHistory.get_results`). A metric regresses if it increases by more than its
+    threshold in percent, and for compilation times if the confidence intervals don't overlap.
+    Metrics and benchmarks which aren't available anymore are also regressions.
 
-    assert len(drivers) == passed + failed, \
-        "Mismatch in number of tests with status " \
-        f"({passed} passed, {failed} failed, {len(drivers)} found)"
+    Returns a tuple of (description, regressed) for each benchmark.
+    """
+    comparisons = []
+    for (opt_flag, test), baseline_metrics in sorted(
+        baseline.items(), key=lambda item: (item[0][0] or "", item[0][1])
+    ):
+        name = f"{test} ({opt_flag or 'no optimisation flag'})"
+        if (metrics := current.get((opt_flag, test))) is None:
+            comparisons.append((f"{name}: not benchmarked", True))
+            continue
 
-    return passed, passed + failed
+        changes = []
+        regressed = False
+        for metric, threshold in thresholds.items():
+            if (baseline_value := baseline_metrics.get(metric)) is None:
+                continue
+            if (value := metrics.get(metric)) is None:
+                changes.append(f"{metric.replace('_', ' ')} N/A")
+                regressed = True
+                continue
+            change = (value - baseline_value) / baseline_value * 100 if baseline_value else 0.0
+            metric_regressed = change > threshold
+            if metric == "compilation_time" and metric_regressed:
+                baseline_ci, ci = baseline_metrics.get("compilation_time_ci"), metrics.get("compilation_time_ci")
+                metric_regressed = baseline_ci is None or ci is None or ci[0] > baseline_ci[1]
+            regressed |= metric_regressed
+            changes.append(f"{metric.replace('_', ' ')} {change:+.1f}%{' (regression)' if metric_regressed else ''}")
+        comparisons.append((f"{name}: {', '.join(changes)}", regressed))
+    return comparisons
 
-def student_compiler(
-    compiler_path: Path,
-    repetitions: int = 0,
-    opt_flag: str | None = None
-) -> CompilerType:
+def report_benchmark_comparison(
+    benchmark_history: BenchmarkHistory,
+    baseline: str,
+    thresholds: dict[str, float]
+) -> int:
     """
-    Wrapper for `build/c_compiler [opt_flag] -S <input_file> -o <log_stem>.s`,
-    with optional time measurement. Additional arguments are passed to `run_test_step`.
+    Prints the comparison of the current benchmark run with a baseline run (see `compare_benchmarks`).
 
-    Returns None if successful, a TestError otherwise.
+    Returns the number of benchmarks regressing.
     """
-    def compiler(input_file: Path, output_stem: Path, **kwargs) -> TestError | None:
-        env = environ.copy()
+    if (baseline_run := benchmark_history.find_run(baseline)) is None:
+        reporter.warning(f"No benchmark run matching {baseline} to compare with")
+        return 0
 
-        cmd = [compiler_path, "-S", input_file, "-o", append_suffix_to_stem(output_stem, "s")]
-        if opt_flag is not None:
-            cmd.insert(1, opt_flag)
+    reporter.error(
+        f"[bold]Benchmark comparison of run {benchmark_history.run} with run {baseline_run}:[/]",
+        style="purple"
+    )
+    regressions = 0
+    for description, regressed in compare_benchmarks(
+        benchmark_history.get_results(baseline_run),
+        benchmark_history.get_results(benchmark_history.run),
+        thresholds
+    ):
+        regressions += regressed
+        reporter.error(rich_escape(f"\t{description}"), style="red" if regressed else "purple")
+    return regressions
 
-        if repetitions > 0:
-            time_cmd = [
-                "/usr/bin/time", "-f", "%e",
-                "-o", append_suffix_to_stem(output_stem, "compilation_time.log")
-            ]
-            cmd = time_cmd + [
-                "bash", "-lc",
-                f"for i in $(seq 1 {repetitions}); do {shlex.join([str(el) for el in cmd])}; done"
-            ]
-        else:
-            # Modifying environment to store sanitizer errors
-            env["ASAN_OPTIONS"] = f"log_path={output_stem}.asan.log"
-            env["UBSAN_OPTIONS"] = f"log_path={output_stem}.ubsan.log"
+def merge_shards(
+    paths: list[Path],
+    root_dir: Path,
+    tests_dir: Path,
+    report_path: Path,
+    benchmark_history: BenchmarkHistory,
+    benchmark_baseline: str | None = None,
+    regression_thresholds: dict[str, float] | None = None
+) -> bool:
+    """
+    Merges the results of test runs, typically of shards of the tests run on different machines,
+    found in files and directories: JUnit reports (`*.xml`) into `report_path`, coverage data
+    (`*.info`) into `coverage/`, and benchmark histories as a single run in `benchmark_history`,
+    compared with `benchmark_baseline` if given (see `report_benchmark_comparison`).
+
+    Returns True if successful, False on errors and benchmark regressions.
+    """
+    files = sorted(
+        file for path in paths
+        for file in (path.rglob("*") if path.is_dir() else [path])
+        if file.is_file()
+    )
+
+    reports = [file for file in files if file.suffix == ".xml"]
+    passing_tests, tests = merge_junit_reports(reports, report_path)
+    # Benchmarks only run on demand, so are only expected if reported
+    found_tests = {
+        get_relative_path_str(test_from_driver(driver))
+        for driver in get_drivers_from_path(tests_dir, exclude_dir=tests_dir / BENCHMARK_DIR_NAME)
+    }
+    if missing_tests := found_tests - tests:
+        reporter.warning(f"{len(missing_tests)} found test cases are missing from the reports")
+    reporter.error(
+        f"[bold]Passed {len(passing_tests)}/{len(tests)} test cases of {len(reports)} reports[/]",
+        style="cyan"
+    )
 
+    success = True
+    if info_files := [file for file in files if file.suffix == ".info"]:
+        if not merge_coverage(info_files, root_dir / "coverage", log_stem=report_path.with_name("coverage")):
+            reporter.error(f"Merging coverage data failed, see {get_relative_path_str(report_path.parent)}")
+            success = False
 
-        return run_test_step(step=TestStep.COMPILER, cmd=cmd, log_stem=output_stem, env=env, **kwargs)
+    if histories := [file for file in files if file.name == BENCHMARK_HISTORY_FILE_NAME]:
+        results = benchmark_history.record_latest_runs(histories)
+        reporter.info(f"Merged {results} benchmark results as run {benchmark_history.run}")
+        if benchmark_baseline is not None and report_benchmark_comparison(
+            benchmark_history, benchmark_baseline, regression_thresholds or DEFAULT_REGRESSION_THRESHOLDS
+        ):
+            success = False
 
-    return compiler
+    return success
 
-def symlink_reference_compiler(_input_file: Path, output_stem: Path, **_kwargs) -> TestError | None:
+class FileWatcher():
     """
-    Symlinks the result of riscv-gcc as its own result and move its logs as our own.
-    It isn't really a compiler but can be passed as a compiler function to use the result of
-    riscv-gcc as the output of the compiler, thus testing the ability of riscv-gcc to pass tests.
-
-    Returns None; never fails.
+    Watcher of the files in directories and their subdirectories, with inotify,
+    or by polling their modification times where inotify is unavailable.
     """
-    reference_stem = append_suffix_to_stem(output_stem, TestStep.REFERENCE.value)
-    compiler_stem = append_suffix_to_stem(output_stem, TestStep.COMPILER.value)
-    for suffix in ["stdout.log", "stderr.log"]:
-        move(
-            append_suffix_to_stem(reference_stem, suffix),
-            append_suffix_to_stem(compiler_stem, suffix)
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_FORMAT = "iIII"
+
+    def __init__(self, dirs: list[Path], poll_interval: float = 0.5, settle_time: float = 0.1):
+        self._dirs = dirs
+        self._poll_interval = poll_interval
+        self._settle_time = settle_time
+        self._fd = None
+        self._watched_dirs = {}
+        self._mtimes = {}
+
+    def __enter__(self):
+        try:
+            libc = ctypes.CDLL(None, use_errno=True)
+            self._inotify_add_watch = libc.inotify_add_watch
+            self._inotify_add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+            if (fd := libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)) < 0:
+                raise OSError(ctypes.get_errno(), strerror(ctypes.get_errno()))
+            self._fd = fd
+            for dir in self._dirs:
+                self._add_watches(dir)
+        except (OSError, AttributeError) as e:
+            if self._fd is not None:
+                close(self._fd)
+                self._fd = None
+            reporter.warning(f"Polling files for changes, inotify is unavailable: {e}")
+            self._mtimes = self._get_mtimes()
+        return self
+
+    def _add_watches(self, dir: Path):
+        mask = (
+            self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM
+            | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE
         )
-    append_suffix_to_stem(output_stem, "s").symlink_to(append_suffix_to_stem(output_stem, "gcc.s"))
-    return None
+        for subdir in chain([dir], (path for path in dir.rglob("*") if path.is_dir())):
+            if (wd := self._inotify_add_watch(self._fd, bytes(subdir), mask)) < 0:
+                raise OSError(ctypes.get_errno(), strerror(ctypes.get_errno()), str(subdir))
+            self._watched_dirs[wd] = subdir
 
-def remake_dir(dir: Path):
-    rmtree(dir, ignore_errors=True)
-    dir.mkdir(parents=True, exist_ok=True)
+    def _get_mtimes(self) -> dict[Path, int]:
+        mtimes = {}
+        for dir in self._dirs:
+            for path in dir.rglob("*"):
+                try:
+                    mtimes[path] = path.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+        return mtimes
 
-def get_drivers_from_path(dir: Path, exclude_dir: Path | None = None) -> list[Path]:
-    return [driver for driver in dir.rglob("*_driver.c")
-            if exclude_dir is None or not driver.is_relative_to(exclude_dir)]
+    def _read_changes(self, timeout: float | None) -> set[Path]:
+        """Returns the files changed within `timeout` seconds, or forever if None."""
+        if self._fd is None:
+            deadline = None if timeout is None else perf_counter() + timeout
+            while True:
+                mtimes = self._get_mtimes()
+                changes = {
+                    path for path in mtimes.keys() | self._mtimes.keys()
+                    if mtimes.get(path) != self._mtimes.get(path)
+                }
+                self._mtimes = mtimes
+                if changes or (deadline is not None and perf_counter() >= deadline):
+                    return changes
+                sleep(self._poll_interval if deadline is None else min(self._poll_interval, timeout))
 
-def benchmark(output_dir: Path, benchmark_dir: Path, repetitions: int):
-    assert repetitions > 0, f"Number of repetitions should be positive, got {repetitions}"
+        with selectors.DefaultSelector() as selector:
+            selector.register(self._fd, selectors.EVENT_READ)
+            if not selector.select(timeout):
+                return set()
 
-    for driver in get_drivers_from_path(benchmark_dir):
-        output_stem =  output_stem_from_test(output_dir, test_from_driver(driver))
+        changes = set()
+        data = read(self._fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from(self.EVENT_FORMAT, data, offset)
+            offset += struct.calcsize(self.EVENT_FORMAT)
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            if (dir := self._watched_dirs.get(wd)) is None or not name:
+                continue
+            path = dir / name
+            if mask & self.IN_ISDIR:
+                # New directories are watched as well, with the files created in them so far
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO) and path.is_dir():
+                    self._add_watches(path)
+                    changes.update(file for file in path.rglob("*") if file.is_file())
+                continue
+            changes.add(path)
+        return changes
 
-        # Compilation time obtained from the time spent by compiler to compiler the test case
-        compilation_log = append_suffix_to_stem(output_stem, "compilation_time.log")
-        try:
-            total_compilation_time = compilation_log.read_text(encoding="utf-8").strip()
-            compilation_time = float(total_compilation_time) / repetitions
-        except (FileNotFoundError, ValueError):
-            compilation_time = None
+    def wait(self) -> set[Path]:
+        """
+        Waits for files to change, then for them to stop changing for a moment,
+        as editors and compilers often write files in several steps.
 
-        # Simulated instructions using ASM rdinstret in driver code
-        simulation_log = append_suffix_to_stem(output_stem, "simulation.stdout.log")
-        try:
-            simulated_instructions = int(simulation_log.read_text(encoding="utf-8").strip())
-        except ValueError:
-            simulated_instructions = None
-
-        # Binary size obtained as the sum of .text + .data + .rodata sections of ELF file
-        elf_file = output_stem.with_suffix(".o")
-        cmd = ["riscv32-unknown-elf-size", "-A", elf_file]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-        binary_size = 0
-        try:
-            for parts in (line.split() for line in result.stdout.splitlines()):
-                if len(parts) >= 2 and parts[0] in {".text", ".data", ".rodata"}:
-                    binary_size += int(parts[1])
-        except ValueError:
-            binary_size = None
+        Returns the files changed (including created and deleted).
+        """
+        changes = self._read_changes(timeout=None)
+        while new_changes := self._read_changes(timeout=self._settle_time):
+            changes |= new_changes
+        return changes
 
-        reporter.error(
-            f"\t{output_stem.name}: "
-            f"compilation time = {compilation_time or 'N/A'} s, "
-            f"simulated instructions = {simulated_instructions or 'N/A'}, "
-            f"binary size = {binary_size or 'N/A'} B",
-            style="purple"
-        )
+    def __exit__(self, *_):
+        if self._fd is not None:
+            close(self._fd)
+
+def watch_tests(
+    watcher: FileWatcher,
+    tests_dir: Path,
+    get_drivers: Callable[[], list[Path]],
+    rerun_tests: Callable[[list[Path]], tuple[int, int]],
+    rebuild: Callable[[], bool] | None = None
+):
+    """
+    Reruns tests whenever the files watched by `watcher` change, until interrupted.
+    Changes to tests (in `tests_dir`) only rerun those tests, while other changes rerun all tests
+    found by `get_drivers`, after calling `rebuild` if given and only if it succeeds.
+    """
+    while True:
+        reporter.info("Watching for changes, press Ctrl+C to stop", style="cyan")
+        changes = watcher.wait()
+
+        if all(path.is_relative_to(tests_dir) for path in changes):
+            drivers = [
+                driver for driver in get_drivers()
+                if driver in changes or test_from_driver(driver) in changes
+            ]
+        elif rebuild is None or rebuild():
+            drivers = get_drivers()
+        else:
+            continue
+
+        if drivers:
+            passing_tests, total_tests = rerun_tests(drivers)
+            reporter.error(f"[bold]Passed {passing_tests}/{total_tests} rerun test cases[/]", style="cyan")
+
+def parse_shard(arg: str) -> tuple[int, int]:
+    """Parses `<index>/<count>`, e.g. `1/4`."""
+    index, _, count = arg.partition("/")
+    if not 1 <= int(index) <= int(count):
+        raise ValueError(f"Shard {index} doesn't exist out of {count}")
+    return int(index), int(count)
+
+def parse_matrix_configuration(arg: str) -> tuple[str, str, str]:
+    """
+    Parses `[<compiler flags>][@<isa>/<abi>]`, e.g. `-O1`, `@rv32im_zicntr/ilp32`
+    or `-O2@rv32imac_zicntr/ilp32`.
+
+    Returns a tuple of (compiler flags, isa, abi).
+    """
+    flags, _, target = arg.partition("@")
+    if not target:
+        return flags.strip(), DEFAULT_ISA, DEFAULT_ABI
+    isa, _, abi = target.partition("/")
+    if not isa or not abi:
+        raise ValueError(f"Expected <isa>/<abi> after @, got {target}")
+    return flags.strip(), isa, abi
+
+def parse_step_jobs(arg: str) -> tuple[TestStep, int]:
+    """Parses `<step>=<jobs>`, e.g. `simulation=4`."""
+    step, _, jobs = arg.partition("=")
+    return TestStep(step), int(jobs)
+
+def parse_step_timeout(arg: str) -> tuple[TestStep, float]:
+    """Parses `<step>=<seconds>`, e.g. `simulation=5`."""
+    step, _, seconds = arg.partition("=")
+    return TestStep(step), float(seconds)
+
+def parse_regression_threshold(arg: str) -> tuple[str, float]:
+    """Parses `<metric>=<percent>`, e.g. `binary_size=5`."""
+    metric, _, percent = arg.partition("=")
+    if metric not in DEFAULT_REGRESSION_THRESHOLDS:
+        raise ValueError(f"Unknown metric {metric}")
+    return metric, float(percent)
 
 def parse_args() -> Namespace:
     """Wrapper for argument parsing."""
@@ -599,6 +3537,54 @@ def parse_args() -> Namespace:
         help="Build compiler and run tests using parallelism. "
             "Use -j to use the default job count, or -j N to use exactly N jobs. "
     )
+    parser.add_argument(
+        "--step_jobs",
+        action="append",
+        type=parse_step_jobs,
+        default=[],
+        metavar="STEP=N",
+        help="Run at most N instances of a test step at the same time, within the job count. "
+            "Use it to limit heavy steps, e.g. --step_jobs simulation=4. "
+            f"Steps are: {', '.join(step.value for step in TestStep)}."
+    )
+    parser.add_argument(
+        "--timeout",
+        action="append",
+        type=parse_step_timeout,
+        default=[],
+        metavar="STEP=SECONDS",
+        help="Stop a test step after it has run for SECONDS, e.g. --timeout simulation=5. "
+            "Use 0 to never stop it. By default, the simulation is stopped after "
+            f"{DEFAULT_STEP_TIMEOUTS[TestStep.SIMULATION]:g} s and other steps after "
+            f"{DEFAULT_STEP_TIMEOUTS[TestStep.COMPILER]:g} s."
+    )
+    parser.add_argument(
+        "--adaptive_timeout",
+        nargs="?",
+        const=10.0,
+        default=0.0,
+        type=float,
+        metavar="FACTOR",
+        help="Stop the simulation of a test after FACTOR times the simulation time of its GCC "
+            f"reference (and at least {MIN_ADAPTIVE_SIMULATION_TIMEOUT:g} s), within the simulation "
+            "time limit. The reference of each test is simulated the first time it runs, and its "
+            f"time is stored in {BUILD_DIR_NAME}/{REFERENCE_TIMINGS_FILE_NAME}. "
+            "Use --adaptive_timeout for the default factor, or --adaptive_timeout FACTOR to choose it."
+    )
+    parser.add_argument(
+        "--failed_first",
+        action="store_true",
+        default=False,
+        help="Run the tests that failed in their last run before the others. "
+            "Tests always run in order of decreasing duration of their last run otherwise."
+    )
+    parser.add_argument(
+        "--fail_fast",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Stop starting tests after N tests have failed."
+    )
     parser.add_argument(
         "--verbosity",
         type=lambda arg: Verbosity(int(arg)),
@@ -607,6 +3593,17 @@ def parse_args() -> Namespace:
         help="Disable verbose output into the terminal. Note that all logs will "
             "be stored automatically into log files regardless of this option."
     )
+    parser.add_argument(
+        "--simulator",
+        type=Simulator,
+        choices=Simulator,
+        default=Simulator.SPIKE,
+        metavar="{" + ",".join(simulator.value for simulator in Simulator) + "}",
+        help=f"Simulate tests with spike (by default), or with {Simulator.QEMU.value} for faster runs. "
+            f"Before using {Simulator.QEMU.value}, the references of {SIMULATOR_CHECK_SAMPLE_SIZE} random tests "
+            "are simulated with both to check they agree, falling back to spike otherwise. "
+            "Benchmarks are always simulated with spike, which counts instructions."
+    )
     parser.add_argument(
         "--clean",
         action="store_true",
@@ -637,8 +3634,136 @@ def parse_args() -> Namespace:
         type=int,
         metavar="N",
         help="Benchmark compiler and gather related statistics like compilation "
-            "time, execution time, and ELF size. Use --benchmark to use the default "
-            "compilation repetitions, or --benchmark N to do exactly N repetitions."
+            "time, execution time, and ELF size, with their ratios to GCC at "
+            f"{', '.join(GCC_REFERENCE_LEVELS)} (cached in {BUILD_DIR_NAME}/{GCC_REFERENCES_FILE_NAME}). "
+            "Compilation is repeated until its median time "
+            "is known precisely enough (see --benchmark_precision). Use --benchmark to use the "
+            "default maximum compilation repetitions, or --benchmark N to do at most N repetitions."
+    )
+    parser.add_argument(
+        "--benchmark_precision",
+        type=float,
+        default=1.0,
+        metavar="PERCENT",
+        help="Stop repeating the compilation of a benchmark once the 95%% confidence interval "
+            "of its median time is within PERCENT%% of it."
+    )
+    parser.add_argument(
+        "--pin_benchmark",
+        action="store_true",
+        default=False,
+        help="Benchmark compilation in parallel with jobs > 1, each benchmark running alone on "
+            "a CPU reserved for benchmarks while other steps run on the remaining CPUs. "
+            "Samples which took noticeably longer than their CPU time are discarded in any case."
+    )
+    parser.add_argument(
+        "--idle_siblings",
+        action="store_true",
+        default=False,
+        help="With --pin_benchmark, leave the other hardware threads (hyperthreads) of "
+            "the cores of reserved CPUs idle."
+    )
+    parser.add_argument(
+        "--profile_benchmark",
+        action="store_true",
+        default=False,
+        help="Simulate benchmarks logging every instruction, and report the instructions "
+            "executed by each function and the hottest basic blocks, named after the labels of "
+            "the assembly, next to GCC. Profiles are stored next to the outputs of each benchmark."
+    )
+    parser.add_argument(
+        "--scaling_benchmark",
+        action="store_true",
+        default=False,
+        help=f"Run each kernel of tests/{BENCHMARK_DIR_NAME}/{SCALING_BENCHMARK_DIR_NAME} for sizes "
+            f"N from {SCALING_BENCHMARK_SIZES[0]} to {SCALING_BENCHMARK_SIZES[-1]} (generated into "
+            f"{BUILD_DIR_NAME}/{SCALING_BENCHMARK_DIR_NAME}), fit how the simulated instructions grow "
+            "with N, and flag the kernels growing faster than with GCC."
+    )
+    parser.add_argument(
+        "--benchmark_compare",
+        nargs="?",
+        const="previous",
+        default=None,
+        metavar="BASELINE",
+        help="Compare benchmark results with a baseline run, and exit with an error if any "
+            "benchmark regresses (see --regression_threshold). Results of all runs are stored in "
+            f"{BUILD_DIR_NAME}/{BENCHMARK_HISTORY_FILE_NAME}. Use --benchmark_compare to compare "
+            "with the previous run, or --benchmark_compare BASELINE to compare with the run "
+            "started at BASELINE (as printed), or the latest run of the compiler at revision BASELINE."
+    )
+    parser.add_argument(
+        "--regression_threshold",
+        action="append",
+        type=parse_regression_threshold,
+        default=[],
+        metavar="METRIC=PERCENT",
+        help="Consider that a benchmark regresses if METRIC increases by more than PERCENT%%, "
+            "e.g. --regression_threshold binary_size=5. Defaults are "
+            + ", ".join(f"{metric}={threshold:g}" for metric, threshold in DEFAULT_REGRESSION_THRESHOLDS.items())
+            + ". Compilation times also need to be significantly different."
+    )
+    parser.add_argument(
+        "--lazy_reference",
+        action="store_true",
+        default=False,
+        help="Only generate the GCC reference assembly of failing tests, to compare with. "
+            "Tests that GCC rejects are then only reported if they also fail."
+    )
+    parser.add_argument(
+        "--batch_simulation",
+        nargs="?",
+        const=16,
+        default=0,
+        type=int,
+        metavar="N",
+        help="Simulate tests in batches sharing a single spike session, which is faster. "
+            "Tests that can't complete in a batch are simulated on their own. "
+            "Use --batch_simulation for the default batch size, or --batch_simulation N "
+            "to simulate up to N tests per batch."
+    )
+    parser.add_argument(
+        "--scratch",
+        nargs="?",
+        const=Path("/dev/shm"),
+        default=None,
+        type=Path,
+        metavar="DIR",
+        help="Run tests in a temporary directory, ideally in memory, and only keep the outputs "
+            f"of failing tests in {BUILD_DIR_NAME}/{OUTPUT_DIR_NAME}. This is faster when the "
+            "repository is on a slow or network file system. Use --scratch for the default "
+            "directory (/dev/shm), or --scratch DIR to choose one."
+    )
+    parser.add_argument(
+        "--keep_outputs",
+        action="store_true",
+        default=False,
+        help="With --scratch, keep the outputs of all tests rather than only failing ones."
+    )
+    parser.add_argument(
+        "--log_limit",
+        type=int,
+        default=1024,
+        metavar="KiB",
+        help="Only keep the beginning and the end of test step outputs longer than this size, "
+            "so that a program printing endlessly can't fill the disk. Outputs of successful "
+            "steps are only stored if they aren't empty. Use 0 to keep outputs entirely."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Reuse the results of tests whose test file, driver, compiler, flags and toolchain "
+            "did not change since they were last run, instead of running them again. "
+            "Reused tests don't contribute to coverage."
+    )
+    parser.add_argument(
+        "--profile_summary",
+        action="store_true",
+        default=False,
+        help="Print the time used by each test step at the end. "
+            f"The usage of each step is always stored in {BUILD_DIR_NAME}/{OUTPUT_DIR_NAME}/"
+            f"{STEP_PROFILE_FILE_NAME}."
     )
     parser.add_argument(
         "--validate_tests",
@@ -647,7 +3772,107 @@ def parse_args() -> Namespace:
         help="Use GCC to validate tests instead of testing the compiler. "
             "Use it to validate tests you add (see docs/coverage.md for useful tests)."
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--shard",
+        type=parse_shard,
+        default=None,
+        metavar="INDEX/COUNT",
+        help="Only run the tests of one shard out of COUNT, with INDEX from 1 to COUNT, "
+            "to split tests between machines. Shards are balanced with the durations of the "
+            f"last run of each test in {BUILD_DIR_NAME}/{TEST_HISTORY_FILE_NAME}, so all shards "
+            "must have the same version of this file, or none. Shards don't change it, and record "
+            f"their tests in {BUILD_DIR_NAME}/{OUTPUT_DIR_NAME}/{TEST_HISTORY_FILE_NAME} instead. "
+            "See --merge to gather their results."
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help="Merge the results of runs, e.g. of the shards of a run, instead of running tests: "
+            "JUnit reports (*.xml) into a single report (see --report), coverage data (*.info) "
+            f"into coverage/, and {BENCHMARK_HISTORY_FILE_NAME} files as a single benchmark run "
+            "(see --benchmark_compare). Each PATH is a file or a directory to search."
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        default=False,
+        help="Keep running after the tests, and rerun them when files change in src/, include/ "
+            "or tests/: changes to the compiler rebuild it incrementally and rerun all tests "
+            "(those that failed first), while changes to tests only rerun them. Stop with Ctrl+C."
+    )
+    parser.add_argument(
+        "--affected",
+        action="store_true",
+        default=False,
+        help="Only run the tests affected by changes since they last ran: new or modified tests, "
+            "tests that failed, and tests that executed compiler functions that changed. "
+            f"The functions each test executes are recorded in {BUILD_DIR_NAME}/{TEST_COVERAGE_FILE_NAME}, "
+            "from coverage data written separately for each test, so no coverage webpage is "
+            "generated. Requires gcov."
+    )
+    parser.add_argument(
+        "--dual_build",
+        nargs="?",
+        const=10,
+        default=None,
+        type=int,
+        metavar="N",
+        help="Run the tests with the compiler built as with --optimise (into "
+            f"{BUILD_DIR_NAME}/{OPTIMISED_BUILD_DIR_NAME}), then rerun those failing and N random "
+            "others (10 by default) with the compiler built with sanitizers, to link their logs. "
+            "Passing tests failing with sanitizers count as failing. No coverage data is processed."
+    )
+    parser.add_argument(
+        "--matrix",
+        action="append",
+        default=None,
+        type=parse_matrix_configuration,
+        metavar="CONFIG",
+        help="Run the tests in each configuration CONFIG, repeating the option for each one, given as "
+            "[FLAGS][@ISA/ABI] with FLAGS passed to the compiler and ISA/ABI for GCC and spike "
+            f"({DEFAULT_ISA}/{DEFAULT_ABI} by default), e.g. --matrix '' --matrix=-O1 "
+            "--matrix @rv32im_zicntr/ilp32 (with = for flags). They run in a single pass, sharing "
+            f"the reference assembly (cached in {BUILD_DIR_NAME}/{REFERENCE_CACHE_DIR_NAME}) and driver "
+            f"objects, with outputs in {BUILD_DIR_NAME}/{OUTPUT_DIR_NAME}/{MATRIX_OUTPUT_DIR_NAME}, "
+            "a single report, and the number of tests passing in each configuration. "
+            "Results are not reused with --incremental."
+    )
+    parser.add_argument(
+        "--profile_compiler",
+        action="store_true",
+        default=False,
+        help="Build the compiler optimised and instrumented for gprof (into "
+            f"{BUILD_DIR_NAME}/{PROFILE_BUILD_DIR_NAME}), profile the compilation of each test into "
+            f"{BUILD_DIR_NAME}/{COMPILER_PROFILE_DIR_NAME}, then merge the profiles into a flat profile "
+            "and a call graph, print the functions taking the most time and the tests taking "
+            "unusually long to compile. Results are not reused with --incremental, "
+            "and no coverage data is processed."
+    )
+    args = parser.parse_args()
+    if args.profile_compiler and (
+        args.optimise or args.validate_tests or args.affected or args.dual_build is not None
+        or args.matrix is not None or args.watch
+    ):
+        parser.error("--profile_compiler can't be used with --optimise, --validate_tests, --affected, "
+                     "--dual_build, --matrix or --watch")
+    # Benchmarks compare the tests passing with -O1 to those passing in a single configuration
+    if args.matrix is not None and (
+        args.affected or args.dual_build is not None or args.watch or args.benchmark
+    ):
+        parser.error("--matrix can't be used with --affected, --dual_build, --watch or --benchmark")
+    if args.dual_build is not None and (args.optimise or args.validate_tests or args.affected):
+        parser.error("--dual_build can't be used with --optimise, --validate_tests or --affected")
+    if args.affected and (args.optimise or args.validate_tests):
+        parser.error("--affected requires the coverage data of the compiler, "
+                     "so can't be used with --optimise or --validate_tests")
+    if args.benchmark_compare is not None and not (args.benchmark or args.merge):
+        parser.error("--benchmark_compare requires --benchmark or --merge")
+    if args.watch and (args.benchmark or args.merge):
+        parser.error("--watch can't be used with --benchmark or --merge")
+    return args
 
 if __name__ == "__main__":
     root_dir = Path(__file__).resolve().parent
@@ -658,7 +3883,26 @@ if __name__ == "__main__":
     output_dir = build_dir / OUTPUT_DIR_NAME
     tests_dir = root_dir / TESTS_DIR_NAME
     benchmark_dir = tests_dir / BENCHMARK_DIR_NAME
-    compiler_path = MakeRule.BUILD.value
+    build_rule = MakeRule.BUILD
+    if args.dual_build is not None:
+        build_rule = MakeRule.OPTIMISED_BUILD
+    elif args.profile_compiler:
+        build_rule = MakeRule.PROFILE_BUILD
+    compiler_path = build_rule.value
+
+    # Gather the results of shards instead of running tests
+    if args.merge:
+        exit(0 if merge_shards(
+            paths=args.merge,
+            root_dir=root_dir,
+            tests_dir=tests_dir,
+            report_path=output_dir / (args.report or "junit_results.xml"),
+            benchmark_history=BenchmarkHistory(
+                build_dir / BENCHMARK_HISTORY_FILE_NAME, get_compiler_revision(root_dir)
+            ),
+            benchmark_baseline=args.benchmark_compare,
+            regression_thresholds=DEFAULT_REGRESSION_THRESHOLDS | dict(args.regression_threshold)
+        ) else 1)
 
     # Shared arguments to run_make_rule
     run_make_rule_common = partial(
@@ -669,19 +3913,84 @@ if __name__ == "__main__":
     )
 
     # Skip building steps when using riscv-gcc
+    compiler_build = None
     if not args.validate_tests:
         # Clean the repo if required
-        if (args.clean and not run_make_rule_common(
+        if args.clean and not run_make_rule_common(
             rule=MakeRule.CLEAN,
             verbosity=Verbosity.VERBOSE
-        )) or not run_make_rule_common(
-            rule=MakeRule.BUILD,
-            verbosity=Verbosity.NORMAL
         ):
             exit(1)
+        # Build the compiler while the steps of tests that don't depend on it run,
+        # then the one with sanitizers while tests run with the optimised one
+        build_executor = ThreadPoolExecutor(max_workers=1)
+        compiler_build = build_executor.submit(
+            run_make_rule_common,
+            rule=build_rule,
+            verbosity=Verbosity.NORMAL,
+            background=True
+        )
+        if args.dual_build is not None:
+            # Not worth building if the optimised one fails, as tests then don't run
+            sanitizer_build = build_executor.submit(
+                lambda: compiler_build.result() and run_make_rule_common(
+                    rule=MakeRule.BUILD,
+                    verbosity=Verbosity.NORMAL,
+                    background=True
+                )
+            )
+        build_executor.shutdown(wait=False)
+
+    # Clean the output folder, unless results from previous runs are reused
+    if args.incremental:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    else:
+        remake_dir(output_dir)
+
+    # Shards are split with the history of previous runs, which shards then mustn't change
+    # for shards run one after the other, or from the history of one of them, to get the same split,
+    # so they record their tests in a copy of it among their outputs
+    history_path = build_dir / TEST_HISTORY_FILE_NAME
+    if args.shard is not None:
+        history_path = output_dir / TEST_HISTORY_FILE_NAME
+        if (build_dir / TEST_HISTORY_FILE_NAME).exists():
+            copyfile(build_dir / TEST_HISTORY_FILE_NAME, history_path)
+        else:
+            history_path.unlink(missing_ok=True)
+
+    compiler_profile_dir = None
+    if args.profile_compiler:
+        compiler_profile_dir = build_dir / COMPILER_PROFILE_DIR_NAME
+        remake_dir(compiler_profile_dir)
+
+    # Check that the simulator chosen behaves like spike on tests known to be valid
+    simulator = args.simulator
+    if simulator is not Simulator.SPIKE:
+        if which(simulator.value) is None:
+            reporter.error(f"{simulator.value} not found")
+            exit(1)
+        disagreeing_drivers = check_simulators_agree(
+            get_drivers_from_path(tests_dir, exclude_dir=benchmark_dir),
+            (Simulator.SPIKE, simulator),
+            output_dir / "simulator_check"
+        )
+        if disagreeing_drivers is None:
+            reporter.warning(f"Checking {simulator.value} failed, using spike")
+            simulator = Simulator.SPIKE
+        elif disagreeing_drivers:
+            reporter.warning(
+                f"spike and {simulator.value} disagree on "
+                + ", ".join(get_relative_path_str(test_from_driver(driver)) for driver in disagreeing_drivers)
+                + f" (see {get_relative_path_str(output_dir / 'simulator_check')}), using spike"
+            )
+            simulator = Simulator.SPIKE
 
-    # Clean the output folder
-    remake_dir(output_dir)
+    # Time limits of the steps of every test, without those disabled with 0
+    step_timeouts = {
+        step: timeout
+        for step, timeout in (DEFAULT_STEP_TIMEOUTS | dict(args.timeout)).items()
+        if timeout > 0
+    }
 
     # Shared arguments to run_tests
     run_tests_common = partial(
@@ -689,28 +3998,225 @@ if __name__ == "__main__":
         jobs=args.jobs,
         output_dir=output_dir,
         report_path=args.report,
+        # The reference is the output of the compiler when validating tests
+        lazy_reference=args.lazy_reference and not args.validate_tests,
+        driver_cache_dir=build_dir / DRIVER_CACHE_DIR_NAME,
+        batch_size=args.batch_simulation,
+        step_jobs=dict(args.step_jobs),
+        history=TestHistory(history_path),
+        failed_first=args.failed_first,
+        fail_fast=args.fail_fast,
+        profile=(step_profile := StepProfile(output_dir / STEP_PROFILE_FILE_NAME)),
+        scratch_dir=args.scratch,
+        keep_outputs=args.keep_outputs,
+        log_limit=args.log_limit * 1024 if args.log_limit > 0 else None,
+        timeouts=step_timeouts,
+        # The reference is what is being simulated when validating tests
+        reference_timings=ReferenceTimings(
+            build_dir / REFERENCE_TIMINGS_FILE_NAME,
+            get_toolchain_fingerprint((f"{RISCV_TOOLCHAIN_PREFIX}gcc", simulator.value))
+        ) if args.adaptive_timeout > 0 and not args.validate_tests else None,
+        timeout_factor=args.adaptive_timeout,
+        simulator=simulator,
     )
+    # Benchmarks read the instructions simulated, only counted by spike,
+    # whose simulation times are then unrelated to the reference ones
+    benchmark_simulation = {} if simulator.counts_instructions else {
+        "simulator": Simulator.SPIKE,
+        "reference_timings": None,
+    }
+    if benchmark_simulation and (args.benchmark or args.scaling_benchmark):
+        reporter.info(f"Simulating benchmarks with spike, as {simulator.value} doesn't count instructions")
+
+    # Everything the test results depend on, other than the tests and compiler flags,
+    # with the compiler as currently built and the simulator running the tests
+    def get_fingerprint() -> str:
+        toolchain_fingerprint = get_toolchain_fingerprint((f"{RISCV_TOOLCHAIN_PREFIX}gcc", simulator.value))
+        if args.validate_tests:
+            return toolchain_fingerprint
+        wait_compiler_build(compiler_build)
+        return toolchain_fingerprint + f";{TestStep.COMPILER.value}={hash_file(Path(compiler_path))}"
+
+    # Results are kept apart for each compiler configuration, simulator and time limits of steps,
+    # as a test timing out under some limits may pass under others
+    def result_cache(configuration: str) -> ResultCache:
+        timeouts = ",".join(f"{step.value}={timeout:g}" for step, timeout in step_timeouts.items())
+        return ResultCache(
+            path=build_dir / RESULT_CACHE_FILE_NAME,
+            configuration=f"{configuration};simulator={simulator.value};timeouts={timeouts}"
+                f";adaptive_timeout={args.adaptive_timeout:g}",
+            get_fingerprint=get_fingerprint,
+            reuse=args.incremental
+        )
+
+    # Only keep the tests of this shard, balanced with the durations of previous runs
+    def get_drivers(dir: Path, exclude_dir: Path | None = None) -> list[Path]:
+        drivers = get_drivers_from_path(dir, exclude_dir=exclude_dir)
+        if args.shard is None:
+            return drivers
+        with TestHistory(build_dir / TEST_HISTORY_FILE_NAME) as history:
+            return select_shard(drivers, *args.shard, history=history)
+
+    drivers = get_drivers(tests_dir, exclude_dir=benchmark_dir)
+    test_coverage = None
+    if args.affected:
+        test_coverage = TestCoverage(build_dir / TEST_COVERAGE_FILE_NAME, get_toolchain_fingerprint())
+        # Functions of the compiler as built, with their current line ranges
+        try:
+            wait_compiler_build(compiler_build)
+        except CompilerBuildError:
+            exit(1)
+        functions = get_gcov_functions(sorted(build_dir.glob("*.gcno")))
+        if functions is None:
+            reporter.error("Reading the functions of the compiler with gcov failed")
+            exit(1)
+        with test_coverage, TestHistory(history_path) as history:
+            affected_drivers = test_coverage.get_affected(drivers, functions)
+            affected_drivers += [
+                driver for driver in drivers
+                if driver not in affected_drivers and history.has_failed(driver)
+            ]
+        reporter.info(f"Running {len(affected_drivers)} of {len(drivers)} tests affected by changes")
+        drivers = affected_drivers
+
+    # Each configuration of the matrix with the arguments of run_test it overrides,
+    # named after its flags and target
+    configurations = {
+        f"{flags or 'no flags'} {isa}/{abi}": {
+            "compiler": symlink_reference_compiler if args.validate_tests \
+                else student_compiler(compiler_path, opt_flag=flags or None),
+            "isa": isa,
+            "abi": abi,
+            "output_dir": output_dir / MATRIX_OUTPUT_DIR_NAME
+                / re.sub(r"[^\w.@=+-]+", "_", f"{flags}@{isa}_{abi}"),
+        }
+        for flags, isa, abi in args.matrix
+    } if args.matrix is not None else None
+
+    # Run the tests and save the results into JUnit XML file if asked (in CI/CD typically),
+    # stopping as soon as the compiler fails to build
+    try:
+        with test_coverage or nullcontext():
+            passing_tests, total_tests = run_tests_common(
+                drivers=drivers,
+                compiler=symlink_reference_compiler if args.validate_tests \
+                    else student_compiler(
+                        compiler_path, test_coverage=test_coverage, profile_dir=compiler_profile_dir
+                    ),
+                cache=result_cache(
+                    configuration=TestStep.REFERENCE.value if args.validate_tests else ""
+                ) if configurations is None and compiler_profile_dir is None else None,
+                compiler_build=compiler_build,
+                configurations=configurations,
+                reference_cache_dir=build_dir / REFERENCE_CACHE_DIR_NAME if configurations is not None else None,
+            )
+        if compiler_build is not None:
+            wait_compiler_build(compiler_build)
+    except CompilerBuildError:
+        exit(1)
 
-    # Run the tests and save the results into JUnit XML file if asked (in CI/CD typically)
-    passing_tests, total_tests = run_tests_common(
-        drivers=get_drivers_from_path(tests_dir, exclude_dir=benchmark_dir),
-        compiler=symlink_reference_compiler if args.validate_tests \
-            else student_compiler(compiler_path),
+    reporter.error(
+        f"[bold]Passed {passing_tests}/{total_tests} found test cases"
+        + (f" over {len(configurations)} configurations" if configurations is not None else "") + "[/]",
+        style="cyan"
     )
 
-    reporter.error(f"[bold]Passed {passing_tests}/{total_tests} found test cases[/]", style="cyan")
+    if compiler_profile_dir is not None:
+        reporter.error("[bold]Compiler profile:[/]", style="purple")
+        if not report_compiler_profile(Path(compiler_path).resolve(), compiler_profile_dir):
+            exit(1)
+
+    # Rerun the tests failing with the optimised compiler to get sanitizer logs,
+    # and check a sample of the others doesn't fail with sanitizers
+    if args.dual_build is not None:
+        with TestHistory(history_path) as history:
+            failing_drivers, sampled_drivers = sample_sanitizer_reruns(drivers, history, args.dual_build)
+        try:
+            wait_compiler_build(sanitizer_build)
+        except CompilerBuildError:
+            exit(1)
+        # Results with sanitizers are neither stored nor reported, except by failing tests
+        run_sanitizer_tests = partial(
+            run_tests_common,
+            compiler=student_compiler(MakeRule.BUILD.value),
+            report_path=None,
+            history=None,
+            profile=None,
+        )
+        if failing_drivers:
+            passing_failed, total_failed = run_sanitizer_tests(
+                drivers=failing_drivers, status="Rerunning failing tests with sanitizers"
+            )
+            if passing_failed:
+                # Typically undefined behaviour, or code behind assertions
+                reporter.warning(
+                    f"{passing_failed}/{total_failed} failing tests pass with the compiler built with sanitizers"
+                )
+        if sampled_drivers:
+            passing_sampled, total_sampled = run_sanitizer_tests(
+                drivers=sampled_drivers, status="Running sample of passing tests with sanitizers"
+            )
+            if passing_sampled != total_sampled:
+                reporter.error(
+                    f"{total_sampled - passing_sampled}/{total_sampled} sampled passing tests fail with sanitizers"
+                )
+                passing_tests -= total_sampled - passing_sampled
+            reporter.error(
+                f"[bold]Passed {passing_tests}/{total_tests} found test cases with sampled sanitizer checks[/]",
+                style="cyan"
+            )
+
+    # Rerun tests as files change, with the results of the compiler it was last built into
+    if args.watch:
+        with FileWatcher([root_dir / "src", root_dir / "include", tests_dir]) as watcher:
+            try:
+                watch_tests(
+                    watcher=watcher,
+                    tests_dir=tests_dir,
+                    get_drivers=partial(get_drivers, tests_dir, exclude_dir=benchmark_dir),
+                    rerun_tests=lambda drivers: run_tests_common(
+                        drivers=drivers,
+                        compiler=symlink_reference_compiler if args.validate_tests \
+                            else student_compiler(compiler_path),
+                        cache=result_cache(
+                            configuration=TestStep.REFERENCE.value if args.validate_tests else ""
+                        ),
+                        failed_first=True,
+                    ),
+                    rebuild=None if args.validate_tests else partial(
+                        run_make_rule_common, rule=build_rule, verbosity=Verbosity.NORMAL
+                    ),
+                )
+            except KeyboardInterrupt:
+                exit(0)
 
+    benchmark_regressions = 0
     if args.benchmark:
         opt_flag = "-O1"
+        # Results of the compiler are stored, but not those of GCC when validating tests
+        benchmark_history = BenchmarkHistory(
+            build_dir / BENCHMARK_HISTORY_FILE_NAME, get_compiler_revision(root_dir)
+        ) if not args.validate_tests else None
 
-        if args.jobs > 1 or not args.optimise:
+        if (args.jobs > 1 and not args.pin_benchmark) or not args.optimise:
             reporter.warning(f"Benchmarking with jobs > 1 or unoptimised builds can affect timing")
 
+        benchmark_cores = None
+        if args.pin_benchmark:
+            benchmark_cores = BenchmarkCores(args.jobs, idle_siblings=args.idle_siblings)
+            reporter.info(
+                f"Benchmarking on CPUs {', '.join(map(str, benchmark_cores.reserved_cpus))}, "
+                f"other steps on CPUs {', '.join(map(str, sorted(benchmark_cores.other_cpus)))}"
+            )
+
         # Start by checking if students' optimisations don't fail more seen tests than before
         passing_tests_with_opt, _ = run_tests_common(
-            drivers=get_drivers_from_path(tests_dir, exclude_dir=benchmark_dir),
+            drivers=get_drivers(tests_dir, exclude_dir=benchmark_dir),
             compiler=symlink_reference_compiler if args.validate_tests \
                 else student_compiler(compiler_path, opt_flag=opt_flag),
+            cache=result_cache(
+                configuration=TestStep.REFERENCE.value if args.validate_tests else opt_flag
+            ),
         )
         if passing_tests_with_opt < passing_tests:
             reporter.error(f"Enabling optimisations with {opt_flag} causes "
@@ -725,24 +4231,78 @@ if __name__ == "__main__":
 
         for optimisation_msg, opt_flag in benchmark_configs:
 
-            # Run the benchmark tests according to opt_flag
-            passing_benchmark, total_benchmark = run_tests_common(
-                drivers=get_drivers_from_path(benchmark_dir),
-                status=f"Running benchmark{optimisation_msg}",
-                compiler=symlink_reference_compiler if args.validate_tests \
-                    else student_compiler(compiler_path, repetitions=args.benchmark, opt_flag=opt_flag),
-            )
+            # Run the benchmark tests according to opt_flag,
+            # with the threads running them on the CPUs not reserved for benchmarks
+            with benchmark_cores.isolate() if benchmark_cores is not None else nullcontext():
+                passing_benchmark, total_benchmark = run_tests_common(
+                    drivers=(benchmark_drivers := get_drivers(
+                        benchmark_dir, exclude_dir=benchmark_dir / SCALING_BENCHMARK_DIR_NAME
+                    )),
+                    status=f"Running benchmark{optimisation_msg}",
+                    # Benchmark results are read from the outputs, and compared with the reference
+                    scratch_dir=None,
+                    lazy_reference=False,
+                    compiler=symlink_reference_compiler if args.validate_tests \
+                        else student_compiler(
+                            compiler_path,
+                            repetitions=args.benchmark,
+                            opt_flag=opt_flag,
+                            precision=args.benchmark_precision / 100,
+                            cores=benchmark_cores
+                        ),
+                    **benchmark_simulation,
+                )
 
             if passing_benchmark != total_benchmark:
                 reporter.warning(f"Skipping benchmarking{optimisation_msg} due to failures")
                 continue
 
             reporter.error(f"[bold]Benchmark results{optimisation_msg}:[/]", style="purple")
-            benchmark(output_dir=output_dir, benchmark_dir=benchmark_dir, repetitions=args.benchmark)
+            with GccReferences(build_dir / GCC_REFERENCES_FILE_NAME, get_toolchain_fingerprint()) as gcc_references:
+                benchmark_results = benchmark(
+                    output_dir=output_dir, drivers=benchmark_drivers, gcc_references=gcc_references
+                )
+            if args.profile_benchmark:
+                reporter.error(f"[bold]Benchmark profiles{optimisation_msg}:[/]", style="purple")
+                report_benchmark_profiles(output_dir=output_dir, drivers=benchmark_drivers)
+            if benchmark_history is not None:
+                benchmark_history.record(opt_flag, benchmark_results)
 
         passing_tests += passing_benchmark
         total_tests += total_benchmark
 
+        if benchmark_history is not None and args.benchmark_compare is not None:
+            benchmark_regressions = report_benchmark_comparison(
+                benchmark_history,
+                args.benchmark_compare,
+                DEFAULT_REGRESSION_THRESHOLDS | dict(args.regression_threshold)
+            )
+
+    if args.scaling_benchmark:
+        scaling_drivers = generate_scaling_benchmarks(
+            benchmark_dir / SCALING_BENCHMARK_DIR_NAME, build_dir / SCALING_BENCHMARK_DIR_NAME
+        )
+        passing_scaling, total_scaling = run_tests_common(
+            drivers=scaling_drivers,
+            status="Running scaling benchmarks",
+            # Instructions are read from the outputs and compared with the reference
+            scratch_dir=None,
+            lazy_reference=False,
+            report_path=None,
+            compiler=symlink_reference_compiler if args.validate_tests else student_compiler(compiler_path),
+            **benchmark_simulation,
+        )
+        if passing_scaling != total_scaling:
+            reporter.warning(f"{total_scaling - passing_scaling} scaling benchmark sizes failed")
+        reporter.error("[bold]Scaling benchmark results:[/]", style="purple")
+        with TestHistory(history_path) as history:
+            report_scaling_benchmarks(output_dir=output_dir, drivers=scaling_drivers, history=history)
+
+    if args.profile_summary:
+        reporter.error("[bold]Step profile:[/]", style="purple")
+        for line in step_profile.get_summary():
+            reporter.error(f"\t{line}", style="purple")
+
     # Skip unavailable coverage and exit immediately for test validation
     if args.validate_tests:
         if passing_tests != total_tests:
@@ -754,9 +4314,13 @@ if __name__ == "__main__":
         reporter.error(f"All {total_tests} tests are valid!", style="cyan")
         exit(0)
 
-    # Run coverage if students' compiler was built w/o optimising
-    if not (args.optimise or run_make_rule_common(
-        rule=MakeRule.COVERAGE,
-        verbosity=Verbosity.DEBUG
-    )):
+    # Run coverage if students' compiler was built w/o optimising, and counters are from all tests
+    if not (
+        args.optimise or args.affected or args.dual_build is not None or args.profile_compiler
+        or run_make_rule_common(rule=MakeRule.COVERAGE, verbosity=Verbosity.DEBUG)
+    ):
+        exit(1)
+
+    if benchmark_regressions:
+        reporter.error(f"Number of benchmarks regressing: {benchmark_regressions}")
         exit(1)
\ No newline at end of file
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+"""
+Regression checks of test.py itself, rather than of the compiler.
+
+Usage: python3 -m unittest test_harness
+"""
+
+import unittest
+import importlib.util
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Loaded from its path, as `import test` would find the standard library test package
+spec = importlib.util.spec_from_file_location("harness", Path(__file__).resolve().parent / "test.py")
+harness = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(harness)
+
+class RunMeasuredSubprocessTest(unittest.TestCase):
+    def test_timeout_after_outputs_closed(self):
+        """A step closing its outputs then running past its time limit times out."""
+        with TemporaryDirectory() as output_dir:
+            log_stem = Path(output_dir) / "step"
+            return_code, _ = harness.run_measured_subprocess(
+                ["sh", "-c", "exec >&- 2>&-; sleep 3"], log_stem, timeout=1, log_limit=1000
+            )
+            self.assertEqual(return_code, harness.TIMEOUT_RETURNCODE)
+
+if __name__ == "__main__":
+    unittest.main()
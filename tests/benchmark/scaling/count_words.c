@@ -0,0 +1,21 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+int count_words(char *s)
+{
+    int words;
+    int in_word;
+
+    words = 0;
+    in_word = 0;
+    while (*s != '\0') {
+        if (*s == ' ' || *s == '\n' || *s == '\t') {
+            in_word = 0;
+        } else if (!in_word) {
+            in_word = 1;
+            words++;
+        }
+        s++;
+    }
+
+    return words;
+}
@@ -0,0 +1,36 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+#include <stdint.h>
+#include <inttypes.h>
+#include <stdio.h>
+#include "../benchmark.h"
+
+#ifndef N
+#define N 8
+#endif
+
+int count_words(char *s);
+
+static char text[N + 1];
+
+int main(void)
+{
+    int i, expected = 0;
+
+    /* Words of 1 to 4 letters separated by a space */
+    for (i = 0; i < N; i++) {
+        text[i] = i % 5 == 4 || i % 7 == 6 ? ' ' : 'a' + i % 26;
+        if (text[i] != ' ' && (i == 0 || text[i - 1] == ' ')) {
+            expected++;
+        }
+    }
+    text[N] = '\0';
+
+    uint64_t i0 = rdinstret64();
+    int result = count_words(text);
+    uint64_t i1 = rdinstret64();
+
+    printf("%" PRIu64 "\n", i1 - i0);
+
+    return result != expected;
+}
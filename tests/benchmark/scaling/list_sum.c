@@ -0,0 +1,20 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+struct node
+{
+    int value;
+    struct node *next;
+};
+
+int list_sum(struct node *head)
+{
+    int sum;
+
+    sum = 0;
+    while (head) {
+        sum += head->value;
+        head = head->next;
+    }
+
+    return sum;
+}
@@ -0,0 +1,52 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+#include <stdint.h>
+#include <inttypes.h>
+#include <stdio.h>
+#include "../benchmark.h"
+
+#ifndef N
+#define N 8
+#endif
+
+struct node
+{
+    int value;
+    struct node *next;
+};
+
+int list_sum(struct node *head);
+
+static struct node nodes[N];
+static int order[N];
+
+int main(void)
+{
+    int i, j, tmp, expected = 0;
+    uint32_t seed = 54321;
+
+    /* Links nodes in a shuffled order, so that following them jumps around memory */
+    for (i = 0; i < N; i++) {
+        order[i] = i;
+    }
+    for (i = N - 1; i > 0; i--) {
+        seed = seed * 1103515245u + 12345u;
+        j = (seed >> 16) % (i + 1);
+        tmp = order[i];
+        order[i] = order[j];
+        order[j] = tmp;
+    }
+    for (i = 0; i < N; i++) {
+        nodes[order[i]].value = i;
+        nodes[order[i]].next = i + 1 < N ? &nodes[order[i + 1]] : 0;
+        expected += i;
+    }
+
+    uint64_t i0 = rdinstret64();
+    int result = list_sum(&nodes[order[0]]);
+    uint64_t i1 = rdinstret64();
+
+    printf("%" PRIu64 "\n", i1 - i0);
+
+    return result != expected;
+}
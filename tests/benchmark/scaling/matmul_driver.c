@@ -0,0 +1,37 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+#include <stdint.h>
+#include <inttypes.h>
+#include <stdio.h>
+#include "../benchmark.h"
+
+#ifndef N
+#define N 8
+#endif
+
+int matmul_trace(int *a, int *b, int *c, int n);
+
+static int A[N * N], B[N * N], C[N * N];
+
+int main(void)
+{
+    int i, k, expected = 0;
+
+    for (i = 0; i < N * N; i++) {
+        A[i] = i % 7 - 3;
+        B[i] = i % 5 - 2;
+    }
+    for (i = 0; i < N; i++) {
+        for (k = 0; k < N; k++) {
+            expected += A[i * N + k] * B[k * N + i];
+        }
+    }
+
+    uint64_t i0 = rdinstret64();
+    int result = matmul_trace(A, B, C, N);
+    uint64_t i1 = rdinstret64();
+
+    printf("%" PRIu64 "\n", i1 - i0);
+
+    return result != expected;
+}
@@ -0,0 +1,43 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+#include <stdint.h>
+#include <inttypes.h>
+#include <stdio.h>
+#include "../benchmark.h"
+
+#ifndef N
+#define N 8
+#endif
+
+struct particle
+{
+    int x;
+    int y;
+    int vx;
+    int vy;
+};
+
+int update_particles(struct particle *particles, int n, int width);
+
+static struct particle particles[N];
+
+int main(void)
+{
+    int i, expected = 0;
+
+    for (i = 0; i < N; i++) {
+        particles[i].x = i % 100;
+        particles[i].y = (i * 7) % 100;
+        particles[i].vx = i % 5 - 2;
+        particles[i].vy = i % 3 - 1;
+        expected += particles[i].vx * particles[i].vx + particles[i].vy * particles[i].vy;
+    }
+
+    uint64_t i0 = rdinstret64();
+    int result = update_particles(particles, N, 100);
+    uint64_t i1 = rdinstret64();
+
+    printf("%" PRIu64 "\n", i1 - i0);
+
+    return result != expected;
+}
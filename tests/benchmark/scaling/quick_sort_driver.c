@@ -0,0 +1,39 @@
+/* DISCLAIMER: Benchmark tests are NOT part of the assessed tests */
+
+#include <stdint.h>
+#include <inttypes.h>
+#include <stdio.h>
+#include "../benchmark.h"
+
+#ifndef N
+#define N 8
+#endif
+
+void quick_sort(int *a, int low, int high);
+
+static int A[N];
+
+int main(void)
+{
+    int i;
+    uint32_t seed = 12345;
+
+    /* Pseudo-random values from a linear congruential generator */
+    for (i = 0; i < N; i++) {
+        seed = seed * 1103515245u + 12345u;
+        A[i] = (int)(seed >> 16) % 1000;
+    }
+
+    uint64_t i0 = rdinstret64();
+    quick_sort(A, 0, N - 1);
+    uint64_t i1 = rdinstret64();
+
+    printf("%" PRIu64 "\n", i1 - i0);
+
+    for (i = 1; i < N; i++) {
+        if (A[i - 1] > A[i]) {
+            return 1;
+        }
+    }
+    return 0;
+}